@@ -0,0 +1,86 @@
+"""入站适配器 - 工具调用调度
+
+MCP 的工具处理函数运行在事件循环中，WorklogService 的方法会读写文件、扫描会话，
+直接调用会阻塞同一客户端的其他请求（包括 list_tools）。调度器把阻塞调用放到
+线程池执行：每个工具有独立的并发上限，读操作之间并行，整体重写某天日报的操作按
+日期串行（跨进程的互斥仍由存储层的文件锁保证）。追加不持有日期锁，由存储层自行
+串行化，同一天的并发追加才能合并为一次组提交。
+"""
+
+import asyncio
+import functools
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# 会话采集会扫描大量文件，默认限制同时进行的数量，给其他工具留出线程
+DEFAULT_TOOL_LIMITS = {"collect_sessions": 2}
+
+
+class ToolDispatcher:
+    """把工具的阻塞调用分派到线程池"""
+
+    def __init__(self, max_workers: int = 4, tool_limits: dict[str, int] | None = None) -> None:
+        self.max_workers = max_workers
+        # 未配置的工具最多占满整个线程池
+        self.tool_limits = {**DEFAULT_TOOL_LIMITS, **(tool_limits or {})}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mcp-worklog-tool"
+        )
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._date_locks: dict[date, tuple[asyncio.Lock, int]] = {}  # 锁和使用者数
+
+    async def read(self, tool: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """执行只读调用，受工具并发上限约束"""
+        async with self.limit(tool):
+            return await self.run(func, *args, **kwargs)
+
+    async def append(self, tool: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """执行追加调用，只受工具并发上限约束，不持有日期锁"""
+        return await self.read(tool, func, *args, **kwargs)
+
+    async def write(
+        self, tool: str, target_date: date, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """执行写入某天日报的调用，同一天的写入依次进行"""
+        async with self.limit(tool), self._date_lock(target_date):
+            return await self.run(func, *args, **kwargs)
+
+    @asynccontextmanager
+    async def limit(self, tool: str) -> AsyncIterator[None]:
+        """占用工具的一个并发名额，用于包含多步调用的工具"""
+        semaphore = self._semaphores.get(tool)
+        if semaphore is None:
+            limit = self.tool_limits.get(tool, self.max_workers)
+            semaphore = self._semaphores.setdefault(tool, asyncio.Semaphore(max(1, limit)))
+        async with semaphore:
+            yield
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    @asynccontextmanager
+    async def _date_lock(self, target_date: date) -> AsyncIterator[None]:
+        """持有某天的写锁；没有调用方等待时移除，避免长期运行时按天累积"""
+        lock, users = self._date_locks.get(target_date, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._date_locks[target_date] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            _, users = self._date_locks[target_date]
+            if users == 1:
+                del self._date_locks[target_date]
+            else:
+                self._date_locks[target_date] = (lock, users - 1)
+
+    def close(self) -> None:
+        """等待进行中的调用完成后关闭线程池"""
+        self._executor.shutdown(wait=True)
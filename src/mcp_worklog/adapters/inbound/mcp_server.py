@@ -8,11 +8,23 @@ from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
 from mcp_worklog.application import WorklogService
+from mcp_worklog.application.pagination import SessionPaginator
 
+from .dispatch import ToolDispatcher
 
-def create_mcp_server(service: WorklogService) -> Server:
-    """创建 MCP Server 实例"""
+
+def create_mcp_server(
+    service: WorklogService,
+    paginator: SessionPaginator | None = None,
+    dispatcher: ToolDispatcher | None = None,
+) -> Server:
+    """创建 MCP Server 实例
+
+    工具的阻塞调用通过 dispatcher 放到线程池执行，不阻塞事件循环。
+    """
     server = Server("mcp-worklog")
+    paginator = paginator or SessionPaginator()
+    dispatcher = dispatcher or ToolDispatcher()
 
     @server.list_tools()
     async def list_tools() -> list[Tool]:
@@ -44,16 +56,39 @@ def create_mcp_server(service: WorklogService) -> Server:
                     },
                 },
             ),
+            Tool(
+                name="get_range_digest",
+                description="一次获取日期范围内每天的日报内容，用于撰写周报、月报",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "start_date": {
+                            "type": "string",
+                            "description": "起始日期，格式 YYYY-MM-DD",
+                        },
+                        "end_date": {
+                            "type": "string",
+                            "description": "结束日期（含），格式 YYYY-MM-DD，不填则为今天",
+                        },
+                    },
+                    "required": ["start_date"],
+                },
+            ),
             Tool(
                 name="polish_digest",
-                description="润色日报内容（去重、重新编号），返回内容供 LLM 合并相似条目后调用 rewrite_digest 重写",
+                description="润色日报内容。默认返回内容供 LLM 合并相似条目后调用 rewrite_digest 重写；mode=merge 时在本地去重并合并相似条目后直接保存",
                 inputSchema={
                     "type": "object",
                     "properties": {
                         "date": {
                             "type": "string",
                             "description": "日期，格式 YYYY-MM-DD，不填则为今天",
-                        }
+                        },
+                        "mode": {
+                            "type": "string",
+                            "enum": ["llm", "merge"],
+                            "description": "llm：返回内容由 LLM 合并（默认）；merge：本地合并相似条目，无需再调用 rewrite_digest",
+                        },
                     },
                 },
             ),
@@ -78,7 +113,7 @@ def create_mcp_server(service: WorklogService) -> Server:
             ),
             Tool(
                 name="collect_sessions",
-                description="采集当天 AI 工具会话记录（Claude Code、Kiro、Cursor），支持分页迭代总结",
+                description="采集当天或指定日期范围的 AI 工具会话记录（Claude Code、Kiro、Cursor），支持分页迭代总结",
                 inputSchema={
                     "type": "object",
                     "properties": {
@@ -86,36 +121,102 @@ def create_mcp_server(service: WorklogService) -> Server:
                             "type": "string",
                             "description": "日期，格式 YYYY-MM-DD，不填则为今天",
                         },
+                        "start_date": {
+                            "type": "string",
+                            "description": "范围起始日期，格式 YYYY-MM-DD，与 end_date 一起使用时忽略 date",
+                        },
+                        "end_date": {
+                            "type": "string",
+                            "description": "范围结束日期（含），格式 YYYY-MM-DD，不填则为今天",
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "上一页返回的游标，翻页时传入以保证分页基于同一份快照；游标过期后需不带游标从第 1 页重新开始",
+                        },
                         "page": {
                             "type": "integer",
-                            "description": "页码，从 1 开始，每页 50 条消息",
+                            "description": "页码，从 1 开始，每页按长度预算切分",
                             "default": 1,
                         },
                     },
                 },
             ),
+            Tool(
+                name="search_worklog",
+                description="在历史日报中检索工作记录，回答“什么时候做过某件事”",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "检索关键词，支持中英文",
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "最多返回的条目数",
+                            "default": 20,
+                        },
+                    },
+                    "required": ["query"],
+                },
+            ),
         ]
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         if name == "append_worklog":
             summary = arguments.get("summary", "")
-            result = service.append_worklog(summary)
+            result = await dispatcher.append(name, service.append_worklog, summary)
             return [TextContent(type="text", text=result.message)]
 
         elif name == "get_daily_digest":
             date_str = arguments.get("date")
             target_date = _parse_date(date_str) if date_str else None
-            result = service.get_daily_digest(target_date)
+            result = await dispatcher.read(name, service.get_daily_digest, target_date)
             if result.found:
                 return [TextContent(type="text", text=result.content)]
             else:
                 return [TextContent(type="text", text=f"{result.date} 暂无工作记录")]
 
+        elif name == "get_range_digest":
+            start_date = _parse_date(arguments["start_date"])
+            end_str = arguments.get("end_date")
+            end_date = _parse_date(end_str) if end_str else date.today()
+            result = await dispatcher.read(name, service.get_range_digest, start_date, end_date)
+            if not result.days:
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"{result.start_date} ~ {result.end_date} 没有日报",
+                    )
+                ]
+            sections = [
+                f"{result.start_date} ~ {result.end_date} 共 {len(result.days)} 天、"
+                f"{result.entry_count} 条工作记录"
+            ]
+            sections.extend(day.content for day in result.days)
+            return [TextContent(type="text", text="\n\n".join(sections))]
+
         elif name == "polish_digest":
             date_str = arguments.get("date")
             target_date = _parse_date(date_str) if date_str else None
-            result = service.get_daily_digest(target_date)
+            if arguments.get("mode") == "merge":
+                polished = await dispatcher.write(
+                    name,
+                    target_date or date.today(),
+                    service.polish_digest,
+                    target_date,
+                    merge_similar=True,
+                )
+                if not polished.success:
+                    return [TextContent(type="text", text=f"{polished.date} 暂无工作记录")]
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"日报已润色，{polished.original_count} 条合并为 {polished.polished_count} 条\n\n{polished.content}",
+                    )
+                ]
+            result = await dispatcher.read(name, service.get_daily_digest, target_date)
             if not result.found:
                 return [TextContent(type="text", text=f"{result.date} 暂无工作记录")]
             lines = [
@@ -132,7 +233,9 @@ def create_mcp_server(service: WorklogService) -> Server:
             date_str = arguments.get("date")
             entries = arguments.get("entries", [])
             target_date = _parse_date(date_str) if date_str else None
-            result = service.rewrite_digest(target_date, entries)
+            result = await dispatcher.write(
+                name, target_date or date.today(), service.rewrite_digest, target_date, entries
+            )
             if result.success:
                 return [TextContent(type="text", text=f"日报已重写，共 {result.entry_count} 条\n\n{result.content}")]
             else:
@@ -140,41 +243,64 @@ def create_mcp_server(service: WorklogService) -> Server:
 
         elif name == "collect_sessions":
             date_str = arguments.get("date")
+            start_str = arguments.get("start_date")
+            end_str = arguments.get("end_date")
+            cursor = arguments.get("cursor")
             page = arguments.get("page", 1)
-            page_size = 50
-            target_date = _parse_date(date_str) if date_str else None
-            result = service.collect_sessions(target_date)
-            if result.total_count == 0:
-                return [TextContent(type="text", text=f"{result.date} 未发现 AI 会话记录")]
 
-            # 合并所有会话的用户消息并去重
-            all_messages: list[str] = []
-            for s in result.sessions:
-                if s.messages:
-                    for msg in s.messages:
-                        if msg not in all_messages:
-                            all_messages.append(msg)
+            if start_str:
+                start_date = _parse_date(start_str)
+                end_date = _parse_date(end_str) if end_str else date.today()
+                key = f"{start_date:%Y-%m-%d} ~ {end_date:%Y-%m-%d}"
+            else:
+                target_date = _parse_date(date_str) if date_str else date.today()
+                key = f"{target_date:%Y-%m-%d}"
 
-            total_messages = len(all_messages)
-            total_pages = (total_messages + page_size - 1) // page_size
-            start_idx = (page - 1) * page_size
-            end_idx = min(start_idx + page_size, total_messages)
-            page_messages = all_messages[start_idx:end_idx]
+            # 带游标的翻页直接读取快照；只给游标时沿用快照对应的日期
+            snapshot = paginator.get(cursor, key if (date_str or start_str) else None)
+            if cursor and snapshot is None:
+                # 不能用新采集的数据续页，否则会混入其他日期的内容、跳过或重复消息
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"游标 {cursor} 已过期或与日期不匹配，请不带 cursor 重新调用 collect_sessions（page=1）从第 1 页开始",
+                    )
+                ]
+            if snapshot is None:
+                async with dispatcher.limit(name):
+                    if start_str:
+                        # 日期范围：每个采集器只扫描一遍，消息按日期标注
+                        sessions = await service.astream_sessions_range(start_date, end_date)
+                        compare_key = _strip_date_label
+                        messages = (
+                            f"[{day:%Y-%m-%d}] {msg}" for day, s in sessions for msg in s.messages or []
+                        )
+                    else:
+                        # 合并所有会话的用户消息，快照构建时去重
+                        sessions = await service.astream_sessions(target_date)
+                        compare_key = None
+                        messages = (msg for s in sessions for msg in s.messages or [])
+                    # 会话流直接交给快照去重，不另外保存完整的会话列表；
+                    # 去重和切页计算量较大，放到线程池中执行
+                    snapshot = await dispatcher.run(paginator.create, key, messages, compare_key)
+                if snapshot.total_messages == 0:
+                    return [TextContent(type="text", text=f"{key} 未发现 AI 会话记录")]
 
-            if not page_messages:
-                return [TextContent(type="text", text=f"第 {page} 页无数据，共 {total_pages} 页")]
+            message_page = paginator.page(snapshot, page)
+            if not message_page.messages:
+                return [TextContent(type="text", text=f"第 {page} 页无数据，共 {message_page.total_pages} 页")]
 
             lines = [
-                f"{result.date} AI 会话内容（第 {page}/{total_pages} 页，共 {total_messages} 条）",
+                f"{snapshot.key} AI 会话内容（第 {page}/{message_page.total_pages} 页，共 {message_page.total_messages} 条）",
                 "",
             ]
-            for msg in page_messages:
+            for msg in message_page.messages:
                 lines.append(f"- {msg}")
 
-            if page < total_pages:
+            if message_page.has_next:
                 lines.append("")
                 lines.append("---")
-                lines.append(f"[自动继续] 还有更多内容，你必须立即调用 collect_sessions(page={page + 1}) 获取下一页，不要等待用户确认")
+                lines.append(f"[自动继续] 还有更多内容，你必须立即调用 collect_sessions(cursor=\"{snapshot.cursor}\", page={page + 1}) 获取下一页，不要等待用户确认")
             else:
                 lines.append("")
                 lines.append("---")
@@ -182,12 +308,28 @@ def create_mcp_server(service: WorklogService) -> Server:
 
             return [TextContent(type="text", text="\n".join(lines))]
 
+        elif name == "search_worklog":
+            query = arguments.get("query", "")
+            limit = arguments.get("limit", 20)
+            result = await dispatcher.read(name, service.search_worklog, query, limit)
+            if result.total_count == 0:
+                return [TextContent(type="text", text=f"未找到与“{query}”相关的工作记录")]
+            lines = [f"“{query}”相关的工作记录（共 {result.total_count} 条）", ""]
+            for hit in result.hits:
+                lines.append(f"- {hit.date} #{hit.entry_number} {hit.content}")
+            return [TextContent(type="text", text="\n".join(lines))]
+
         else:
             return [TextContent(type="text", text=f"未知工具: {name}")]
 
     return server
 
 
+def _strip_date_label(message: str) -> str:
+    """去掉范围采集时添加的 [日期] 标注，只比较消息正文"""
+    return message.partition("] ")[2]
+
+
 def _parse_date(date_str: str) -> date:
     """解析日期字符串"""
     return datetime.strptime(date_str, "%Y-%m-%d").date()
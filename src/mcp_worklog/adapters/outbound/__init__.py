@@ -1 +1,6 @@
 """出站适配器 - 文件存储等被驱动适配器"""
+
+from .polish_state import FilePolishStateStore
+from .storage import LocalFileStorage, SqliteStorage
+
+__all__ = ["LocalFileStorage", "SqliteStorage", "FilePolishStateStore"]
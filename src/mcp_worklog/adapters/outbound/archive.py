@@ -0,0 +1,85 @@
+"""出站适配器 - 月度归档文件
+
+已经结束的月份可以打包成一个 .pack 文件，减少存储目录中的小文件数量。
+文件格式：
+
+    MAGIC (6 字节) | 索引长度 (8 字节，大端) | 索引 JSON | 各天日报正文
+
+索引记录每天正文在数据区的 (偏移, 长度)，读取时通过 mmap 直接切出对应片段。
+"""
+
+import json
+import mmap
+import os
+import struct
+from datetime import date
+from pathlib import Path
+
+MAGIC = b"WLPK1\n"
+_LENGTH = struct.Struct(">Q")
+_HEADER_SIZE = len(MAGIC) + _LENGTH.size
+
+
+class MonthArchive:
+    """单个月度归档文件的只读视图"""
+
+    def __init__(self, path: Path, index: dict[date, tuple[int, int]], data_start: int) -> None:
+        self.path = path
+        self.index = index  # 日期 -> (偏移, 长度)，偏移相对数据区起点
+        self.data_start = data_start
+
+    @classmethod
+    def open(cls, path: Path) -> "MonthArchive":
+        """只读取文件头和索引"""
+        with path.open("rb") as f:
+            header = f.read(_HEADER_SIZE)
+            if len(header) != _HEADER_SIZE or not header.startswith(MAGIC):
+                raise ValueError(f"不是有效的归档文件: {path}")
+            (index_length,) = _LENGTH.unpack_from(header, len(MAGIC))
+            raw_index = json.loads(f.read(index_length).decode("utf-8"))
+        index = {
+            date.fromisoformat(key): (offset, length) for key, (offset, length) in raw_index.items()
+        }
+        return cls(path, index, _HEADER_SIZE + index_length)
+
+    def read(self, target_date: date) -> str | None:
+        """读取单天正文"""
+        return self.read_many([target_date]).get(target_date)
+
+    def read_many(self, dates: list[date]) -> dict[date, str]:
+        """打开一次文件，按索引随机读取多天正文"""
+        wanted = [d for d in dates if d in self.index]
+        if not wanted:
+            return {}
+        texts: dict[date, str] = {}
+        with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for target_date in wanted:
+                offset, length = self.index[target_date]
+                start = self.data_start + offset
+                texts[target_date] = buf[start : start + length].decode("utf-8")
+        return texts
+
+    @staticmethod
+    def write(path: Path, texts: dict[date, str]) -> None:
+        """写入归档文件（临时文件 + 原子替换）"""
+        index: dict[str, tuple[int, int]] = {}
+        chunks: list[bytes] = []
+        offset = 0
+        for target_date in sorted(texts):
+            data = texts[target_date].encode("utf-8")
+            index[target_date.isoformat()] = (offset, len(data))
+            chunks.append(data)
+            offset += len(data)
+        raw_index = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(raw_index)))
+            f.write(raw_index)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
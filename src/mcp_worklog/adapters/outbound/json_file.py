@@ -0,0 +1,19 @@
+"""原子写入 JSON 文件
+
+缓存、检查点和润色水位都以 JSON 文件保存，多个进程可能共用同一目录：先写入
+带进程和线程标识的临时文件再替换，读取方不会看到写了一半的文件，各进程的
+临时文件也互不覆盖。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+def write_json(path: Path, data: object) -> None:
+    """原子写入 JSON（先写唯一的临时文件再替换）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -0,0 +1,37 @@
+"""出站适配器 - 润色水位存储
+
+每天一个 JSON 文件，放在存储目录下的 .polish/ 中，与日报一样按日期划分，
+共用存储目录的多个进程互不覆盖其他日期的水位。
+"""
+
+import json
+from datetime import date
+from pathlib import Path
+
+from mcp_worklog.application.models import PolishState
+
+from .json_file import write_json
+
+
+class FilePolishStateStore:
+    """按天保存润色水位"""
+
+    STATE_DIR = ".polish"
+
+    def __init__(self, base_path: Path) -> None:
+        self.state_dir = base_path / self.STATE_DIR
+
+    def _get_path(self, target_date: date) -> Path:
+        return self.state_dir / f"{target_date.isoformat()}.json"
+
+    def load(self, target_date: date) -> PolishState | None:
+        """读取润色水位，文件不存在或损坏时返回 None（下次润色全量处理）"""
+        try:
+            data = json.loads(self._get_path(target_date).read_text(encoding="utf-8"))
+            return PolishState.from_dict(data)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError):
+            return None
+
+    def save(self, target_date: date, state: PolishState) -> None:
+        """保存润色水位（临时文件 + 原子替换）"""
+        write_json(self._get_path(target_date), state.to_dict())
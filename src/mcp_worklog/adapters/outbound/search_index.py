@@ -0,0 +1,208 @@
+"""出站适配器 - SQLite 倒排索引
+
+词项 -> (日期, 条目编号, 词频, 条目长度) 的倒排表持久化在 SQLite 中，按词项建立主键，
+查询只读取查询词项的倒排记录，不随历史天数线性增长。整体更新以日期为单位：删除
+该日期的旧记录后重新写入，开销只与这一天的条目数有关；追加的单条记录直接写入，
+开销与当天已有的条目数无关。排序使用 BM25。
+"""
+
+import heapq
+import math
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date
+from pathlib import Path
+
+from mcp_worklog.application.models import SearchHit
+from mcp_worklog.domain import DailyDigest
+from mcp_worklog.domain.tokenizer import tokenize
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS docs (
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (date, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, date, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_date ON postings(date);
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    doc_count INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, doc_count, total_length) VALUES (0, 0, 0);
+"""
+_DAY_STATS = "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE date = ?"
+_ADJUST_STATS = (
+    "UPDATE stats SET doc_count = doc_count + ?, total_length = total_length + ? WHERE id = 0"
+)
+_SELECT_STATS = "SELECT doc_count, total_length FROM stats WHERE id = 0"
+_DOC_STATS = "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs WHERE date = ? AND position = ?"
+_DELETE_DOCS = "DELETE FROM docs WHERE date = ?"
+_DELETE_POSTINGS = "DELETE FROM postings WHERE date = ?"
+_DELETE_DOC = "DELETE FROM docs WHERE date = ? AND position = ?"
+_DELETE_DOC_POSTINGS = "DELETE FROM postings WHERE date = ? AND position = ?"
+_DAY_EXISTS = "SELECT 1 FROM days WHERE date = ?"
+_INSERT_DAY = "INSERT OR IGNORE INTO days (date) VALUES (?)"
+_INSERT_DOC = "INSERT INTO docs (date, position, content, length) VALUES (?, ?, ?, ?)"
+_INSERT_POSTING = (
+    "INSERT INTO postings (term, date, position, tf, length) VALUES (?, ?, ?, ?, ?)"
+)
+_SELECT_POSTINGS = "SELECT date, position, tf, length FROM postings WHERE term = ?"
+_SELECT_DOC = "SELECT content FROM docs WHERE date = ? AND position = ?"
+_SELECT_DAYS = "SELECT date FROM days"
+
+
+class SqliteSearchIndex:
+    """日报全文检索索引"""
+
+    DB_FILE = ".search_index.db"
+
+    # BM25 参数
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            db_path, isolation_level=None, check_same_thread=False, timeout=30
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def update(self, digest: DailyDigest) -> None:
+        """用指定日期的最新日报替换该日期的索引"""
+        key = digest.date.isoformat()
+        docs = []
+        postings = []
+        for position, entry in enumerate(digest.entries, start=1):
+            terms = Counter(tokenize(entry.content))
+            length = sum(terms.values())
+            docs.append((key, position, entry.content, length))
+            postings.extend((term, key, position, tf, length) for term, tf in terms.items())
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old_count, old_length = self._conn.execute(_DAY_STATS, (key,)).fetchone()
+                self._conn.execute(_DELETE_POSTINGS, (key,))
+                self._conn.execute(_DELETE_DOCS, (key,))
+                self._conn.execute(_INSERT_DAY, (key,))
+                self._conn.executemany(_INSERT_DOC, docs)
+                self._conn.executemany(_INSERT_POSTING, postings)
+                self._conn.execute(
+                    _ADJUST_STATS,
+                    (len(docs) - old_count, sum(d[3] for d in docs) - old_length),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def add_entry(self, target_date: date, position: int, content: str) -> bool:
+        """把追加的一条记录写入索引，返回是否写入
+
+        该日期还没有建立索引且不是第一条时返回 False，之前的条目不在索引中，
+        调用方需要用 update 重建这一天。
+        """
+        key = target_date.isoformat()
+        terms = Counter(tokenize(content))
+        length = sum(terms.values())
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if position == 1:
+                    # 当天第一条：清掉该日期残留的旧索引（如日报文件被删除后重建）
+                    old_count, old_length = self._conn.execute(_DAY_STATS, (key,)).fetchone()
+                    self._conn.execute(_DELETE_POSTINGS, (key,))
+                    self._conn.execute(_DELETE_DOCS, (key,))
+                elif self._conn.execute(_DAY_EXISTS, (key,)).fetchone() is None:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                else:
+                    doc = (key, position)
+                    old_count, old_length = self._conn.execute(_DOC_STATS, doc).fetchone()
+                    self._conn.execute(_DELETE_DOC_POSTINGS, doc)
+                    self._conn.execute(_DELETE_DOC, doc)
+                self._conn.execute(_INSERT_DAY, (key,))
+                self._conn.execute(_INSERT_DOC, (key, position, content, length))
+                self._conn.executemany(
+                    _INSERT_POSTING,
+                    [(term, key, position, tf, length) for term, tf in terms.items()],
+                )
+                self._conn.execute(_ADJUST_STATS, (1 - old_count, length - old_length))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return True
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """BM25 排序，相关度相同时较新的日期在前"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            # 读事务保证倒排记录与正文来自同一快照
+            self._conn.execute("BEGIN")
+            try:
+                return self._search(terms, limit)
+            finally:
+                self._conn.execute("COMMIT")
+
+    def _search(self, terms: list[str], limit: int) -> list[SearchHit]:
+        """在读事务中打分并取出前 limit 条（调用方持有锁）"""
+        doc_count, total_length = self._conn.execute(_SELECT_STATS).fetchone()
+        if doc_count == 0:
+            return []
+        avg_length = total_length / doc_count or 1
+        postings = {
+            term: self._conn.execute(_SELECT_POSTINGS, (term,)).fetchall() for term in terms
+        }
+
+        # 倒排记录里带有文档长度，打分不需要回表；只为前 limit 条读取正文
+        scores: dict[tuple[str, int], float] = {}
+        for rows in postings.values():
+            idf = math.log(1 + (doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+            for key, position, tf, length in rows:
+                norm = self.K1 * (1 - self.B + self.B * length / avg_length)
+                scores[(key, position)] = scores.get((key, position), 0.0) + (
+                    idf * tf * (self.K1 + 1) / (tf + norm)
+                )
+
+        top = heapq.nlargest(
+            limit, scores.items(), key=lambda item: (item[1], item[0][0], -item[0][1])
+        )
+        contents = [self._conn.execute(_SELECT_DOC, doc).fetchone()[0] for doc, _ in top]
+        return [
+            SearchHit(date=key, entry_number=position, content=content, score=round(score, 4))
+            for ((key, position), score), content in zip(top, contents)
+        ]
+
+    def indexed_dates(self) -> set[date]:
+        """已建立索引的日期"""
+        with self._lock:
+            rows = self._conn.execute(_SELECT_DAYS).fetchall()
+        return {date.fromisoformat(key) for (key,) in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,16 @@
 """会话采集适配器"""
 
+from .cache import CachedSessionCollector
 from .claude_code import ClaudeCodeCollector
 from .cursor import CursorCollector
 from .kiro import KiroCollector
+from .watcher import WatchingSessionCollector, create_watcher
 
-__all__ = ["ClaudeCodeCollector", "KiroCollector", "CursorCollector"]
+__all__ = [
+    "ClaudeCodeCollector",
+    "KiroCollector",
+    "CursorCollector",
+    "CachedSessionCollector",
+    "WatchingSessionCollector",
+    "create_watcher",
+]
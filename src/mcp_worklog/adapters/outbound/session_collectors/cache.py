@@ -0,0 +1,134 @@
+"""按日期缓存会话采集结果
+
+分页调用 collect_sessions 时每页都会重新采集，这里按日期记住结果：
+早于昨天的日期视为不可变并持久化；今天和昨天的结果在源文件指纹变化时失效。
+会话时间戳可能按 UTC 日期归档，东八区等时区在本地零点之后的几个小时里，
+"昨天" 仍会收到新消息，因此昨天不能当作不可变。
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Protocol
+
+from mcp_worklog.domain.session import AISession
+
+from ..json_file import write_json
+
+
+class FingerprintedCollector(Protocol):
+    """能够给出源文件指纹的会话采集器"""
+
+    def collect(self, target_date: date) -> list[AISession]:
+        ...
+
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        ...
+
+    def fingerprint(self, target_date: date) -> str:
+        ...
+
+
+@dataclass
+class _CachedResult:
+    sessions: list[AISession]
+    fingerprint: str | None  # 不可变结果无需指纹
+    immutable: bool  # 采集时日期早于昨天
+
+
+class CachedSessionCollector:
+    """带结果缓存的会话采集器（装饰已有采集器）"""
+
+    def __init__(
+        self,
+        inner: FingerprintedCollector,
+        cache_path: Path | None = None,
+        max_entries: int = 32,
+    ) -> None:
+        self.inner = inner
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _CachedResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def collect(self, target_date: date) -> list[AISession]:
+        """采集指定日期的会话，命中缓存时不再调用被装饰的采集器"""
+        return self.collect_range(target_date, target_date).get(target_date, [])
+
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        """采集日期范围内的会话，只对未命中缓存的日期调用被装饰的采集器"""
+        # 早于该日期的结果不会再变化
+        settled = date.today() - timedelta(days=1)
+        fingerprints: dict[date, str | None] = {}
+        results: dict[date, list[AISession]] = {}
+        missing: list[date] = []
+
+        for n in range(start_date.toordinal(), end_date.toordinal() + 1):
+            day = date.fromordinal(n)
+            fingerprints[day] = None if day < settled else self.inner.fingerprint(day)
+            with self._lock:
+                cached = self._entries.get(day.isoformat())
+                if cached is not None and (
+                    cached.immutable or cached.fingerprint == fingerprints[day]
+                ):
+                    self._entries.move_to_end(day.isoformat())
+                    if cached.sessions:
+                        results[day] = list(cached.sessions)
+                    continue
+            missing.append(day)
+
+        if missing:
+            # 未命中的日期合并为一次范围采集，每个源文件只读一次
+            collected = self.inner.collect_range(missing[0], missing[-1])
+            with self._lock:
+                for day in missing:
+                    sessions = list(collected.get(day, []))
+                    # 采集后日期可能已经翻过，只按采集前的判断决定是否不可变
+                    self._entries[day.isoformat()] = _CachedResult(
+                        sessions=sessions,
+                        fingerprint=fingerprints[day],
+                        immutable=day < settled,
+                    )
+                    self._entries.move_to_end(day.isoformat())
+                    if sessions:
+                        results[day] = list(sessions)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                if missing[0] < settled:
+                    self._save()
+        return dict(sorted(results.items()))
+
+    def _load(self) -> None:
+        """从磁盘加载已过去日期的结果"""
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            for key, sessions in data.items():
+                self._entries[key] = _CachedResult(
+                    sessions=[AISession.from_dict(s) for s in sessions],
+                    fingerprint=None,
+                    immutable=True,
+                )
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError):
+            self._entries.clear()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        """持久化不可变结果（调用方持有锁），按最近使用顺序保存"""
+        if self.cache_path is None:
+            return
+        data = {
+            key: [s.to_dict() for s in result.sessions]
+            for key, result in self._entries.items()
+            if result.immutable
+        }
+        try:
+            write_json(self.cache_path, data)
+        except OSError:
+            pass
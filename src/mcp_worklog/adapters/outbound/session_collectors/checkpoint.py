@@ -0,0 +1,144 @@
+"""会话文件增量读取检查点
+
+追加写入的会话文件（如 Claude Code 的 .jsonl）只会增长，检查点记录每个文件
+已读取到的字节偏移以及按日期聚合的中间结果，下次只需解析新增的尾部。
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from .shards import read_shard, write_shard
+
+
+@dataclass
+class DateAggregate:
+    """单个日期的会话聚合结果"""
+
+    first_timestamp: datetime
+    title: str | None = None
+    message_count: int = 0
+    messages: list[str] = field(default_factory=list)
+
+    def merge(self, later: "DateAggregate") -> None:
+        """合并同一日期在文件后部解析出的聚合结果"""
+        if self.title is None:
+            self.title = later.title
+        self.message_count += later.message_count
+        self.messages.extend(later.messages)
+
+    def to_dict(self) -> dict:
+        return {
+            "first_timestamp": self.first_timestamp.isoformat(),
+            "title": self.title,
+            "message_count": self.message_count,
+            "messages": self.messages,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DateAggregate":
+        return cls(
+            first_timestamp=datetime.fromisoformat(data["first_timestamp"]),
+            title=data.get("title"),
+            message_count=data.get("message_count", 0),
+            messages=list(data.get("messages", [])),
+        )
+
+
+@dataclass
+class TailCheckpoint:
+    """单个文件的读取检查点"""
+
+    inode: int
+    size: int
+    offset: int  # 已完整解析到的字节偏移（总是位于行尾之后）
+    aggregates: dict[str, DateAggregate] = field(default_factory=dict)  # key: YYYY-MM-DD
+    # 从 base_offset 开始解析时，只有不早于 base_date 的日期聚合是完整的
+    base_offset: int = 0
+    base_date: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        """是否从文件开头解析，所有日期的聚合都完整"""
+        return self.base_offset == 0
+
+    def covers(self, day: str) -> bool:
+        """指定日期（YYYY-MM-DD）的聚合是否完整"""
+        return self.complete or (self.base_date is not None and day >= self.base_date)
+
+    def to_dict(self) -> dict:
+        return {
+            "inode": self.inode,
+            "size": self.size,
+            "offset": self.offset,
+            "base_offset": self.base_offset,
+            "base_date": self.base_date,
+            "aggregates": {k: v.to_dict() for k, v in self.aggregates.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TailCheckpoint":
+        return cls(
+            inode=data["inode"],
+            size=data["size"],
+            offset=data["offset"],
+            base_offset=data.get("base_offset", 0),
+            base_date=data.get("base_date"),
+            aggregates={
+                k: DateAggregate.from_dict(v) for k, v in data.get("aggregates", {}).items()
+            },
+        )
+
+
+class CheckpointStore:
+    """检查点存储，每个源文件一个分片；directory 为 None 时仅保存在内存中
+
+    分片在第一次查询对应文件时才读取，修改时间早于查询日期的历史文件不会被
+    加载到内存中。
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory
+        self._checkpoints: dict[str, TailCheckpoint] = {}
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> TailCheckpoint | None:
+        with self._lock:
+            checkpoint = self._checkpoints.get(key)
+            if checkpoint is None and self.directory is not None:
+                checkpoint = self._load(key)
+            return checkpoint
+
+    def _load(self, key: str) -> TailCheckpoint | None:
+        """从磁盘读取单个文件的检查点，损坏的分片视为不存在（调用方持有锁）"""
+        value = read_shard(self.directory, key)
+        if value is None:
+            return None
+        try:
+            checkpoint = TailCheckpoint.from_dict(value)
+        except (KeyError, TypeError, ValueError):
+            return None
+        self._checkpoints[key] = checkpoint
+        return checkpoint
+
+    def put(self, key: str, checkpoint: TailCheckpoint) -> None:
+        with self._lock:
+            self._checkpoints[key] = checkpoint
+            self._dirty.add(key)
+
+    def flush(self) -> None:
+        """只重写有变化的源文件分片"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.directory is None:
+            return
+        for key in list(self._dirty):
+            try:
+                write_shard(self.directory, key, self._checkpoints[key].to_dict())
+            except OSError:
+                continue
+            self._dirty.discard(key)
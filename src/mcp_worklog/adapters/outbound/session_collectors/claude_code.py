@@ -1,85 +1,290 @@
 """Claude Code 会话采集适配器"""
 
 import json
-from datetime import date, datetime
+import os
+import threading
+from datetime import date, datetime, time
 from pathlib import Path
 
-from mcp_worklog.domain.session import AISession, SessionSource
+from mcp_worklog.domain.session import (
+    MAX_MESSAGE_CHARS,
+    AISession,
+    SessionSource,
+    session_order,
+)
+
+from .checkpoint import CheckpointStore, DateAggregate, TailCheckpoint
+from .jsonl_index import JsonlIndexStore, parse_timestamp
+from .manifest import FileManifest, fingerprint_files
+from .parallel import ParallelOptions, map_ordered
+
+# 扫描任务：(文件路径, 起始偏移, 截止日期)，截止日期为 None 时读到文件末尾
+ScanJob = tuple[str, int, str | None]
+# 扫描结果：(结束偏移, 按日期聚合, 是否因超过截止日期提前停止)
+ScanResult = tuple[int, dict[str, DateAggregate], bool]
 
 
 class ClaudeCodeCollector:
-    """Claude Code 会话采集器"""
+    """Claude Code 会话采集器
+
+    会话文件只追加不修改，按文件保存检查点后每次只解析新增的尾部；
+    未变化的文件直接从清单缓存中取结果，不再打开。大文件首次查询时借助
+    稀疏时间索引直接定位目标日期，只解码当天的行。
+    """
+
+    CHECKPOINT_DIR = "claude_code_checkpoints"
+    INDEX_DIR = "claude_code_index"
+    INDEX_MIN_BYTES = 8 * 1024 * 1024  # 小于该大小的文件直接整体解析
 
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        cache_dir: Path | None = None,
+        manifest: FileManifest | None = None,
+        parallel: ParallelOptions | None = None,
+    ) -> None:
         self.base_path = base_path or Path.home() / ".claude" / "projects"
+        checkpoint_dir = cache_dir / self.CHECKPOINT_DIR if cache_dir else None
+        self.checkpoints = CheckpointStore(checkpoint_dir)
+        self.indexes = JsonlIndexStore(cache_dir / self.INDEX_DIR if cache_dir else None)
+        self.manifest = manifest or FileManifest()
+        self.parallel = parallel
+        # 检查点在规划、扫描、合并之间不能被其他调用修改，否则同一段尾部会被合并两次
+        self._collect_lock = threading.Lock()
 
     def collect(self, target_date: date) -> list[AISession]:
         """采集指定日期的 Claude Code 会话"""
-        sessions: list[AISession] = []
+        return self.collect_range(target_date, target_date).get(target_date, [])
 
-        if not self.base_path.exists():
-            return sessions
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        """采集日期范围内的 Claude Code 会话，每个文件只读取一次，按天分组"""
+        with self._collect_lock:
+            return self._collect_range(start_date, end_date)
 
-        # 遍历所有项目目录
-        for project_dir in self.base_path.iterdir():
-            if not project_dir.is_dir():
+    def _collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        session_files = self._source_files()
+        days = _date_keys(start_date, end_date)
+
+        # 先用清单缓存筛掉不含目标日期的文件，剩余文件规划扫描任务后并行解析；
+        # 会话内容只保存在检查点中，清单只记录日期范围
+        found: list[dict[str, AISession]] = []
+        pending: list[
+            tuple[int, Path, os.stat_result, bool, TailCheckpoint | None, ScanJob | None]
+        ] = []
+        for session_file in session_files:
+            found.append({})
+            try:
+                stat = session_file.stat()
+                if not FileManifest.may_contain(stat.st_mtime_ns, start_date):
+                    continue
+                entry = self.manifest.lookup(str(session_file), stat.st_mtime_ns, stat.st_size)
+                if entry is not None and not entry.overlaps(start_date, end_date):
+                    continue
+                checkpoint, job = self._plan_scan(session_file, stat, start_date, end_date)
+            except OSError:
+                continue
+            listed = entry is not None
+            pending.append((len(found) - 1, session_file, stat, listed, checkpoint, job))
+
+        jobs = [job for *_, job in pending if job is not None]
+        scanned = iter(map_ordered(_scan_tail, jobs, self.parallel, cpu_bound=True))
+        for index, session_file, stat, listed, checkpoint, job in pending:
+            result = next(scanned) if job is not None else None
+            if job is not None and result is None:
                 continue
+            key = str(session_file)
+
+            if job is not None and job[2] is not None:
+                # 按索引定位的范围扫描
+                offset, aggregates, stopped = result
+                if checkpoint is None and not stopped:
+                    # 范围之后没有更多内容，以范围起点开始增量跟踪
+                    checkpoint = TailCheckpoint(
+                        inode=stat.st_ino,
+                        size=stat.st_size,
+                        offset=offset,
+                        aggregates=aggregates,
+                        base_offset=job[1],
+                        base_date=days[0],
+                    )
+                    self.checkpoints.put(key, checkpoint)
+            else:
+                if result is not None:
+                    self._apply_scan(checkpoint, stat, *result[:2])
+                    self.checkpoints.put(key, checkpoint)
+                aggregates = checkpoint.aggregates
+                if checkpoint.complete and not listed:
+                    dates = sorted(aggregates)
+                    self.manifest.store_range(
+                        key,
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        date.fromisoformat(dates[0]) if dates else None,
+                        date.fromisoformat(dates[-1]) if dates else None,
+                    )
+            found[index] = {
+                d: self._build_session(session_file, aggregates[d])
+                for d in days
+                if d in aggregates
+            }
+
+        self.checkpoints.flush()
+        self.manifest.flush()
+
+        results: dict[date, list[AISession]] = {}
+        for day in days:
+            sessions = [by_day[day] for by_day in found if day in by_day]
+            if sessions:
+                sessions.sort(key=session_order)
+                results[date.fromisoformat(day)] = sessions
+        return results
+
+    def fingerprint(self, target_date: date) -> str:
+        """可能包含目标日期的源文件状态指纹，用于判断缓存结果是否过期"""
+        return fingerprint_files(self._source_files(), target_date)
+
+    def _source_files(self) -> list[Path]:
+        """遍历所有项目目录，查找 .jsonl 会话文件"""
+        if not self.base_path.exists():
+            return []
+        session_files: list[Path] = []
+        for project_dir in self.base_path.iterdir():
+            if project_dir.is_dir():
+                session_files.extend(project_dir.glob("*.jsonl"))
+        return session_files
+
+    def _plan_scan(
+        self, file_path: Path, stat: os.stat_result, start_date: date, end_date: date
+    ) -> tuple[TailCheckpoint | None, ScanJob | None]:
+        """决定文件的扫描方式
+
+        - 检查点覆盖起始日期：只解析新增尾部（无新增时无需任务）
+        - 无检查点的小文件：从头解析并建立检查点
+        - 其他情况：用时间索引定位起始日期，只解析范围内的行
+        """
+        key = str(file_path)
+        day = start_date.isoformat()
+        checkpoint = self.checkpoints.get(key)
+        if checkpoint is not None and (
+            checkpoint.inode != stat.st_ino or stat.st_size < checkpoint.offset
+        ):
+            # 文件被替换或截断
+            checkpoint = None
+
+        if checkpoint is not None and checkpoint.covers(day):
+            if stat.st_size == checkpoint.size:
+                return checkpoint, None
+            return checkpoint, (key, checkpoint.offset, None)
+
+        if checkpoint is None and stat.st_size < self.INDEX_MIN_BYTES:
+            checkpoint = TailCheckpoint(inode=stat.st_ino, size=0, offset=0)
+            return checkpoint, (key, 0, None)
+
+        index = self.indexes.get(key, stat)
+        with file_path.open("rb") as f:
+            start = index.seek(f, stat.st_size, datetime.combine(start_date, time.min))
+        self.indexes.save(key, index)
+        return checkpoint, (key, start, end_date.isoformat())
+
+    @staticmethod
+    def _build_session(file_path: Path, aggregate: DateAggregate) -> AISession:
+        """由日期聚合结果构建会话"""
+        return AISession(
+            source=SessionSource.CLAUDE_CODE,
+            session_id=file_path.stem,
+            start_time=aggregate.first_timestamp,
+            title=aggregate.title,
+            message_count=aggregate.message_count,
+            messages=list(aggregate.messages),
+        )
+
+    @staticmethod
+    def _apply_scan(
+        checkpoint: TailCheckpoint,
+        stat: os.stat_result,
+        offset: int,
+        aggregates: dict[str, DateAggregate],
+    ) -> None:
+        """把新增尾部的解析结果合并进检查点"""
+        for day, aggregate in aggregates.items():
+            existing = checkpoint.aggregates.get(day)
+            if existing is None:
+                checkpoint.aggregates[day] = aggregate
+            else:
+                existing.merge(aggregate)
+        checkpoint.offset = offset
+        checkpoint.size = stat.st_size
+
+
+def _date_keys(start_date: date, end_date: date) -> list[str]:
+    """日期范围内每天的 YYYY-MM-DD 键"""
+    return [
+        date.fromordinal(n).isoformat()
+        for n in range(start_date.toordinal(), end_date.toordinal() + 1)
+    ]
+
+
+def _scan_tail(job: ScanJob) -> ScanResult | None:
+    """从指定偏移解析文件，返回结束偏移和按日期聚合的结果
+
+    指定截止日期时，遇到晚于该日期的行即停止，结束偏移为该行行首。
+    模块级函数，便于在进程池中执行；读取失败返回 None。
+    """
+    path, offset, stop_after = job
+    aggregates: dict[str, DateAggregate] = {}
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                # 末尾未写完的行留到下次再解析
+                if not line.endswith(b"\n"):
+                    break
+                day = _consume_line(line, aggregates, stop_after)
+                if stop_after is not None and day is not None and day > stop_after:
+                    return offset, aggregates, True
+                offset += len(line)
+    except OSError:
+        return None
+    return offset, aggregates, False
+
+
+def _consume_line(
+    line: bytes, aggregates: dict[str, DateAggregate], stop_after: str | None = None
+) -> str | None:
+    """解析单行消息并累加到对应日期，返回消息日期
+
+    晚于 stop_after 的消息不计入聚合。
+    """
+    if not line.strip():
+        return None
+    try:
+        msg = json.loads(line)
+        # timestamp 可能是 ISO 字符串或毫秒数
+        msg_time = parse_timestamp(msg)
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError, OSError):
+        return None
+    if msg_time is None:
+        return None
+
+    key = msg_time.date().isoformat()
+    if stop_after is not None and key > stop_after:
+        return key
+    aggregate = aggregates.get(key)
+    if aggregate is None:
+        aggregate = DateAggregate(first_timestamp=msg_time)
+        aggregates[key] = aggregate
+    aggregate.message_count += 1
 
-            # 查找 .jsonl 会话文件
-            for session_file in project_dir.glob("*.jsonl"):
-                session = self._parse_session(session_file, target_date)
-                if session:
-                    sessions.append(session)
-
-        return sessions
-
-    def _parse_session(self, file_path: Path, target_date: date) -> AISession | None:
-        """解析单个会话文件"""
-        try:
-            messages = []
-            first_timestamp = None
-            title = None
-
-            with file_path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    if not line.strip():
-                        continue
-                    msg = json.loads(line)
-                    ts = msg.get("timestamp")
-                    if ts:
-                        # timestamp 可能是 ISO 字符串或毫秒数
-                        if isinstance(ts, str):
-                            msg_time = datetime.fromisoformat(ts.replace("Z", "+00:00")).replace(tzinfo=None)
-                        else:
-                            msg_time = datetime.fromtimestamp(ts / 1000)
-                        if msg_time.date() == target_date:
-                            messages.append(msg)
-                            if first_timestamp is None:
-                                first_timestamp = msg_time
-                            # 尝试获取标题（第一条用户消息）
-                            if title is None and msg.get("type") == "human":
-                                content = msg.get("message", {}).get("content", "")
-                                if isinstance(content, str) and content:
-                                    title = content[:50]
-
-            if not messages:
-                return None
-
-            # 提取用户消息内容
-            user_messages: list[str] = []
-            for msg in messages:
-                if msg.get("type") == "human":
-                    content = msg.get("message", {}).get("content", "")
-                    if isinstance(content, str) and content.strip():
-                        user_messages.append(content.strip()[:200])
-
-            return AISession(
-                source=SessionSource.CLAUDE_CODE,
-                session_id=file_path.stem,
-                start_time=first_timestamp,
-                title=title,
-                message_count=len(messages),
-                messages=user_messages,
-            )
-        except (json.JSONDecodeError, KeyError, OSError, ValueError):
-            return None
+    if msg.get("type") != "human":
+        return key
+    message = msg.get("message", {})
+    content = message.get("content", "") if isinstance(message, dict) else ""
+    if not isinstance(content, str):
+        return key
+    # 标题取第一条用户消息
+    if aggregate.title is None and content:
+        aggregate.title = content[:50]
+    # 提取用户消息内容
+    if content.strip():
+        aggregate.messages.append(content.strip()[:MAX_MESSAGE_CHARS])
+    return key
@@ -3,80 +3,211 @@
 import json
 import os
 import sqlite3
+import threading
+from collections.abc import Iterator
 from datetime import date, datetime
 from pathlib import Path
 
-from mcp_worklog.domain.session import AISession, SessionSource
+from mcp_worklog.domain.session import AISession, SessionSource, session_order
 
+from .manifest import FileManifest, ManifestEntry, fingerprint_files
+from .parallel import ParallelOptions, map_ordered
 
-class CursorCollector:
-    """Cursor 会话采集器"""
 
-    def __init__(self, base_path: Path | None = None) -> None:
+class CursorCollector:
+    """Cursor 会话采集器
+
+    以只读方式打开各工作区的 state.vscdb 并复用连接，composer 列表在 SQLite
+    内部用 JSON1 展开，Python 侧不再反序列化整个数据块。
+    """
+
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        manifest: FileManifest | None = None,
+        parallel: ParallelOptions | None = None,
+    ) -> None:
         appdata = os.environ.get("APPDATA", "")
         default_path = Path(appdata) / "Cursor" / "User" / "workspaceStorage"
         self.base_path = base_path or default_path
+        self.manifest = manifest or FileManifest()
+        self.parallel = parallel
+        # 数据库路径 -> (签名, 连接, 连接锁)
+        self._connections: dict[
+            str, tuple[tuple[int, int], sqlite3.Connection, threading.Lock]
+        ] = {}
+        self._pool_lock = threading.Lock()
 
     def collect(self, target_date: date) -> list[AISession]:
         """采集指定日期的 Cursor 会话"""
-        sessions: list[AISession] = []
-
+        return self.collect_range(target_date, target_date).get(target_date, [])
+
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        """采集日期范围内的 Cursor 会话，每个数据库只读取一次，按天分组"""
+        db_paths = self._source_files()
+
+        # sqlite 读取为 I/O 密集型，始终使用线程池
+        entries = map_ordered(
+            lambda db_path: self._collect_db(db_path, start_date), db_paths, self.parallel
+        )
+        self.manifest.flush()
+
+        results: dict[date, list[AISession]] = {}
+        for day in range(start_date.toordinal(), end_date.toordinal() + 1):
+            target_date = date.fromordinal(day)
+            sessions: list[AISession] = []
+            for entry in entries:
+                if entry is not None and entry.covers(target_date):
+                    sessions.extend(entry.sessions_for(target_date))
+            if sessions:
+                sessions.sort(key=session_order)
+                results[target_date] = sessions
+        return results
+
+    def fingerprint(self, target_date: date) -> str:
+        """可能包含目标日期的数据库状态指纹，用于判断缓存结果是否过期"""
+        paths: list[Path] = []
+        for db_path in self._source_files():
+            paths.append(db_path)
+            paths.append(db_path.with_name(db_path.name + "-wal"))
+        return fingerprint_files(paths, target_date)
+
+    def _source_files(self) -> list[Path]:
+        """遍历工作区目录，查找 state.vscdb"""
         if not self.base_path.exists():
-            return sessions
-
-        # 遍历工作区目录
+            return []
+        db_paths: list[Path] = []
         for workspace_dir in self.base_path.iterdir():
             if not workspace_dir.is_dir():
                 continue
 
             db_path = workspace_dir / "state.vscdb"
-            if not db_path.exists():
-                continue
-
-            workspace_sessions = self._parse_db(db_path, target_date)
-            sessions.extend(workspace_sessions)
+            if db_path.exists():
+                db_paths.append(db_path)
+        return db_paths
 
-        return sessions
+    def _collect_db(self, db_path: Path, start_date: date) -> ManifestEntry | None:
+        """通过清单缓存采集单个工作区数据库，返回其清单记录"""
+        key = str(db_path)
+        try:
+            mtime_ns, size = self._db_signature(db_path)
+        except OSError:
+            return None
+        if not FileManifest.may_contain(mtime_ns, start_date):
+            return None
+
+        entry = self.manifest.lookup(key, mtime_ns, size)
+        if entry is None:
+            parsed = self._parse_db(db_path, (mtime_ns, size))
+            if parsed is None:
+                # 读取失败（如数据库被锁）时不写入清单，下次重试
+                return None
+            by_date: dict[str, list[AISession]] = {}
+            for session in parsed:
+                by_date.setdefault(session.start_time.date().isoformat(), []).append(session)
+            entry = self.manifest.store(key, mtime_ns, size, by_date)
+        return entry
+
+    @staticmethod
+    def _db_signature(db_path: Path) -> tuple[int, int]:
+        """数据库文件签名，包含 WAL 文件以免漏掉尚未 checkpoint 的写入"""
+        stat = db_path.stat()
+        mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        wal_path = db_path.with_name(db_path.name + "-wal")
+        if wal_path.exists():
+            wal_stat = wal_path.stat()
+            mtime_ns = max(mtime_ns, wal_stat.st_mtime_ns)
+            size += wal_stat.st_size
+        return mtime_ns, size
+
+    def _connect(
+        self, db_path: Path, signature: tuple[int, int]
+    ) -> tuple[sqlite3.Connection, threading.Lock]:
+        """获取只读连接，数据库未变化时复用已有连接
+
+        没有 WAL 文件时以 immutable 方式打开，完全不加锁，不会与运行中的 Cursor 争用；
+        immutable 连接看不到后续写入，因此数据库签名变化时重新打开。
+        """
+        key = str(db_path)
+        with self._pool_lock:
+            pooled = self._connections.get(key)
+            if pooled is not None and pooled[0] == signature:
+                return pooled[1], pooled[2]
+            if pooled is not None:
+                with pooled[2]:
+                    pooled[1].close()
+
+            wal_path = db_path.with_name(db_path.name + "-wal")
+            has_wal = wal_path.exists() and wal_path.stat().st_size > 0
+            uri = f"{db_path.resolve().as_uri()}?mode=ro"
+            if not has_wal:
+                uri += "&immutable=1"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            lock = threading.Lock()
+            self._connections[key] = (signature, conn, lock)
+            return conn, lock
+
+    def close(self) -> None:
+        """关闭所有复用的连接"""
+        with self._pool_lock:
+            for _, conn, lock in self._connections.values():
+                with lock:
+                    conn.close()
+            self._connections.clear()
+
+    def _parse_db(self, db_path: Path, signature: tuple[int, int]) -> list[AISession] | None:
+        """解析 SQLite 数据库，读取失败返回 None"""
+        try:
+            conn, lock = self._connect(db_path, signature)
+            with lock:
+                try:
+                    rows = list(self._query_composers(conn))
+                except sqlite3.OperationalError:
+                    # SQLite 不支持 JSON1 时退回到 Python 解析整个 JSON
+                    rows = self._load_composers(conn)
+        except (sqlite3.Error, json.JSONDecodeError, KeyError, OSError, AttributeError):
+            return None
 
-    def _parse_db(self, db_path: Path, target_date: date) -> list[AISession]:
-        """解析 SQLite 数据库"""
         sessions: list[AISession] = []
-
-        try:
-            conn = sqlite3.connect(str(db_path))
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT value FROM ItemTable WHERE key = 'composer.composerData'"
-            )
-            row = cursor.fetchone()
-            conn.close()
-
-            if not row:
-                return sessions
-
-            data = json.loads(row[0])
-            composers = data.get("allComposers", [])
-
-            for composer in composers:
-                created_at = composer.get("createdAt")
-                if not created_at:
-                    continue
-
-                start_time = datetime.fromtimestamp(created_at / 1000)
-                if start_time.date() != target_date:
-                    continue
-
-                sessions.append(
-                    AISession(
-                        source=SessionSource.CURSOR,
-                        session_id=composer.get("composerId", ""),
-                        start_time=start_time,
-                        title=composer.get("name"),
-                        message_count=0,  # Cursor 不直接存储消息数
-                    )
+        for composer_id, name, created_at in rows:
+            if not created_at:
+                continue
+            sessions.append(
+                AISession(
+                    source=SessionSource.CURSOR,
+                    session_id=composer_id or "",
+                    start_time=datetime.fromtimestamp(created_at / 1000),
+                    title=name,
+                    message_count=0,  # Cursor 不直接存储消息数
                 )
-
-        except (sqlite3.Error, json.JSONDecodeError, KeyError, OSError):
-            pass
-
+            )
         return sessions
+
+    @staticmethod
+    def _query_composers(conn: sqlite3.Connection) -> Iterator[tuple[str | None, str | None, int | None]]:
+        """在 SQLite 内部展开 composer 列表，只把需要的三个字段逐行读入 Python"""
+        cursor = conn.execute(
+            """
+            SELECT json_extract(e.value, '$.composerId'),
+                   json_extract(e.value, '$.name'),
+                   json_extract(e.value, '$.createdAt')
+            FROM ItemTable AS t, json_each(CAST(t.value AS TEXT), '$.allComposers') AS e
+            WHERE t.key = 'composer.composerData'
+            """
+        )
+        yield from cursor
+
+    @staticmethod
+    def _load_composers(conn: sqlite3.Connection) -> list[tuple[str | None, str | None, int | None]]:
+        """读取整个 composer 数据并在 Python 中解析"""
+        row = conn.execute(
+            "SELECT value FROM ItemTable WHERE key = 'composer.composerData'"
+        ).fetchone()
+        if not row:
+            return []
+
+        data = json.loads(row[0])
+        return [
+            (c.get("composerId", ""), c.get("name"), c.get("createdAt"))
+            for c in data.get("allComposers", [])
+        ]
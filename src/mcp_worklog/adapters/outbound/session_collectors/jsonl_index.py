@@ -0,0 +1,162 @@
+"""JSONL 会话文件的稀疏时间索引
+
+会话文件中的消息按时间顺序写入，记录少量 (字节偏移, 时间戳) 采样点后即可
+二分查找目标日期第一行的位置，无需从头解码整个文件。
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+from ..json_file import write_json
+from .shards import shard_path
+
+
+def parse_timestamp(msg: dict) -> datetime | None:
+    """解析消息时间戳（ISO 字符串或毫秒数），统一为无时区 datetime"""
+    ts = msg.get("timestamp")
+    if not ts:
+        return None
+    if isinstance(ts, str):
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).replace(tzinfo=None)
+    return datetime.fromtimestamp(ts / 1000)
+
+
+@dataclass
+class JsonlTimeIndex:
+    """单个文件的稀疏时间索引"""
+
+    inode: int
+    samples: list[tuple[int, datetime]] = field(default_factory=list)  # 按偏移升序
+    dirty: bool = False
+
+    # 二分查找区间缩小到该字节数以内后改为顺序扫描
+    LINEAR_SCAN_BYTES = 64 * 1024
+
+    def add_sample(self, offset: int, timestamp: datetime) -> None:
+        """记录采样点"""
+        offsets = [s[0] for s in self.samples]
+        pos = bisect_left(offsets, offset)
+        if pos < len(offsets) and offsets[pos] == offset:
+            return
+        self.samples.insert(pos, (offset, timestamp))
+        self.dirty = True
+
+    def seek(self, f: BinaryIO, size: int, target: datetime) -> int:
+        """返回第一条时间戳不早于 target 的行附近的行首偏移
+
+        返回位置之前的带时间戳行都早于 target，从该位置顺序扫描即可。
+        """
+        lo, hi = 0, size
+        # 先用已有采样点缩小区间
+        for offset, timestamp in self.samples:
+            if timestamp < target:
+                lo = max(lo, offset)
+            else:
+                hi = min(hi, offset)
+                break
+
+        while hi - lo > self.LINEAR_SCAN_BYTES:
+            mid = (lo + hi) // 2
+            probe = self._probe(f, mid, hi)
+            if probe is None:
+                hi = mid
+                continue
+            offset, length, timestamp = probe
+            if timestamp < target:
+                lo = offset + length
+            else:
+                hi = offset
+        return lo
+
+    def _probe(self, f: BinaryIO, start: int, end: int) -> tuple[int, int, datetime] | None:
+        """从 start 之后的第一个行首开始，找到 end 之前第一条带时间戳的行"""
+        f.seek(start)
+        if start > 0:
+            f.readline()  # 跳过被截断的行
+        while True:
+            offset = f.tell()
+            if offset >= end:
+                return None
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                return None
+            try:
+                timestamp = parse_timestamp(json.loads(line))
+            except (json.JSONDecodeError, AttributeError, TypeError, ValueError, OSError):
+                continue
+            if timestamp is not None:
+                self.add_sample(offset, timestamp)
+                return offset, len(line), timestamp
+
+    def to_dict(self) -> dict:
+        return {
+            "inode": self.inode,
+            "samples": [[offset, ts.isoformat()] for offset, ts in self.samples],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JsonlTimeIndex":
+        return cls(
+            inode=data["inode"],
+            samples=[(offset, datetime.fromisoformat(ts)) for offset, ts in data["samples"]],
+        )
+
+
+class JsonlIndexStore:
+    """索引存储，每个会话文件对应缓存目录下的一个 sidecar 文件
+
+    directory 为 None 时仅保存在内存中。
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory
+        self._indexes: dict[str, JsonlTimeIndex] = {}
+        self._lock = threading.Lock()
+
+    def _sidecar_path(self, key: str) -> Path | None:
+        if self.directory is None:
+            return None
+        return shard_path(self.directory, key)
+
+    def get(self, key: str, stat: os.stat_result) -> JsonlTimeIndex:
+        """获取文件索引，文件被替换时重建
+
+        文件只追加，已有采样点在文件增长后仍然有效。
+        """
+        with self._lock:
+            index = self._indexes.get(key)
+        if index is None:
+            index = self._load(key)
+        if index is None or index.inode != stat.st_ino or (
+            index.samples and index.samples[-1][0] >= stat.st_size
+        ):
+            index = JsonlTimeIndex(inode=stat.st_ino)
+        with self._lock:
+            self._indexes[key] = index
+        return index
+
+    def _load(self, key: str) -> JsonlTimeIndex | None:
+        path = self._sidecar_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return JsonlTimeIndex.from_dict(json.loads(path.read_text(encoding="utf-8")))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, OSError):
+            return None
+
+    def save(self, key: str, index: JsonlTimeIndex) -> None:
+        """持久化有新增采样点的索引"""
+        path = self._sidecar_path(key)
+        if path is None or not index.dirty:
+            return
+        try:
+            write_json(path, index.to_dict())
+            index.dirty = False
+        except OSError:
+            pass
@@ -1,79 +1,199 @@
 """Kiro 会话采集适配器"""
 
 import json
+import mmap
 import os
+import re
+from collections.abc import Iterator
 from datetime import date, datetime
 from pathlib import Path
 
-from mcp_worklog.domain.session import AISession, SessionSource
+from mcp_worklog.domain.session import (
+    MAX_MESSAGE_CHARS,
+    AISession,
+    SessionSource,
+    session_order,
+)
+
+from .manifest import FileManifest, ManifestEntry, fingerprint_files
+from .parallel import ParallelOptions, map_ordered
+
+_METADATA_PATTERN = re.compile(rb'"metadata"\s*:\s*\{')
+_CHAT_PATTERN = re.compile(rb'"chat"\s*:\s*\[')
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
 
 
 class KiroCollector:
-    """Kiro 会话采集器"""
+    """Kiro 会话采集器
+
+    先只读取 .chat 文件的 metadata.startTime，日期不匹配时不再解析对话内容；
+    匹配的文件逐条解码 chat 数组提取用户消息。
+    """
 
-    def __init__(self, base_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        base_path: Path | None = None,
+        manifest: FileManifest | None = None,
+        parallel: ParallelOptions | None = None,
+    ) -> None:
         appdata = os.environ.get("APPDATA", "")
         default_path = Path(appdata) / "Kiro" / "User" / "globalStorage" / "kiro.kiroagent"
         self.base_path = base_path or default_path
+        self.manifest = manifest or FileManifest()
+        self.parallel = parallel
 
     def collect(self, target_date: date) -> list[AISession]:
         """采集指定日期的 Kiro 会话"""
-        sessions: list[AISession] = []
+        return self.collect_range(target_date, target_date).get(target_date, [])
 
-        if not self.base_path.exists():
-            return sessions
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        """采集日期范围内的 Kiro 会话，每个文件只读取一次，按天分组"""
+        chat_files = self._source_files()
 
-        # 遍历工作区目录
-        for workspace_dir in self.base_path.iterdir():
-            if not workspace_dir.is_dir():
+        # 先用清单缓存筛掉无需解析的文件，剩余文件并行解析
+        entries: list[ManifestEntry | None] = []
+        pending: list[tuple[int, Path, os.stat_result]] = []
+        for chat_file in chat_files:
+            entry = None
+            try:
+                stat = chat_file.stat()
+            except OSError:
+                entries.append(None)
                 continue
+            if FileManifest.may_contain(stat.st_mtime_ns, start_date):
+                entry = self.manifest.lookup(str(chat_file), stat.st_mtime_ns, stat.st_size)
+                # 只记录了日期范围且与目标范围相交时，需要解析对话内容
+                if entry is None or (entry.sessions is None and entry.overlaps(start_date, end_date)):
+                    pending.append((len(entries), chat_file, stat))
+                    entry = None
+            entries.append(entry)
 
-            # 查找 .chat 文件
-            for chat_file in workspace_dir.glob("*.chat"):
-                session = self._parse_session(chat_file, target_date)
-                if session:
-                    sessions.append(session)
+        parsed = map_ordered(
+            self._parse_session,
+            [(path, start_date, end_date) for _, path, _ in pending],
+            self.parallel,
+            cpu_bound=True,
+        )
+        for (index, chat_file, stat), (start_time, session) in zip(pending, parsed):
+            key = str(chat_file)
+            if session is not None:
+                by_date = {session.start_time.date().isoformat(): [session]}
+                entries[index] = self.manifest.store(key, stat.st_mtime_ns, stat.st_size, by_date)
+            else:
+                start = start_time.date() if start_time else None
+                entries[index] = self.manifest.store_range(
+                    key, stat.st_mtime_ns, stat.st_size, start, start
+                )
 
-        return sessions
+        self.manifest.flush()
 
-    def _parse_session(self, file_path: Path, target_date: date) -> AISession | None:
-        """解析单个会话文件"""
+        results: dict[date, list[AISession]] = {}
+        for entry in entries:
+            if entry is None or not entry.overlaps(start_date, end_date):
+                continue
+            for session in entry.sessions_for(entry.first_date):
+                results.setdefault(session.start_time.date(), []).append(session)
+        for sessions in results.values():
+            sessions.sort(key=session_order)
+        return dict(sorted(results.items()))
+
+    def fingerprint(self, target_date: date) -> str:
+        """可能包含目标日期的源文件状态指纹，用于判断缓存结果是否过期"""
+        return fingerprint_files(self._source_files(), target_date)
+
+    def _source_files(self) -> list[Path]:
+        """遍历工作区目录，查找 .chat 文件"""
+        if not self.base_path.exists():
+            return []
+        chat_files: list[Path] = []
+        for workspace_dir in self.base_path.iterdir():
+            if workspace_dir.is_dir():
+                chat_files.extend(workspace_dir.glob("*.chat"))
+        return chat_files
+
+    @staticmethod
+    def _parse_session(job: tuple[Path, date, date]) -> tuple[datetime | None, AISession | None]:
+        """解析单个会话文件，返回 (开始时间, 会话)
+
+        开始日期不在范围内时只返回开始时间。静态方法，便于在进程池中执行。
+        """
+        file_path, start_date, end_date = job
         try:
-            with file_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            metadata = data.get("metadata", {})
-            start_time_ms = metadata.get("startTime")
-            if not start_time_ms:
-                return None
-
-            start_time = datetime.fromtimestamp(start_time_ms / 1000)
-            if start_time.date() != target_date:
-                return None
-
-            chat_messages = data.get("chat", [])
-            # 提取用户消息内容（Kiro 使用 "human" 作为用户角色）
-            title = None
-            user_messages: list[str] = []
-            for msg in chat_messages:
-                role = msg.get("role", "")
-                if role in ("user", "human"):
-                    content = msg.get("content", "")
-                    if isinstance(content, str) and content.strip():
-                        # 跳过系统提示词
-                        if content.startswith("# System Prompt"):
-                            continue
-                        if title is None:
-                            title = content[:50]
-                        user_messages.append(content.strip()[:200])
-
-            return AISession(
+            with file_path.open("rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None, None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    start_time_ms = _read_start_time(buf)
+                    if not start_time_ms:
+                        return None, None
+
+                    start_time = datetime.fromtimestamp(start_time_ms / 1000)
+                    if not start_date <= start_time.date() <= end_date:
+                        return start_time, None
+
+                    # 提取用户消息内容（Kiro 使用 "human" 作为用户角色）
+                    title = None
+                    message_count = 0
+                    user_messages: list[str] = []
+                    for msg in _iter_chat(buf):
+                        message_count += 1
+                        role = msg.get("role", "")
+                        if role in ("user", "human"):
+                            content = msg.get("content", "")
+                            if isinstance(content, str) and content.strip():
+                                # 跳过系统提示词
+                                if content.startswith("# System Prompt"):
+                                    continue
+                                if title is None:
+                                    title = content[:50]
+                                user_messages.append(content.strip()[:MAX_MESSAGE_CHARS])
+
+            return start_time, AISession(
                 source=SessionSource.KIRO,
                 session_id=file_path.stem,
                 start_time=start_time,
                 title=title,
-                message_count=len(chat_messages),
+                message_count=message_count,
                 messages=user_messages,
             )
-        except (json.JSONDecodeError, KeyError, OSError):
-            return None
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError, OSError, ValueError):
+            return None, None
+
+
+def _read_start_time(buf: mmap.mmap) -> int | None:
+    """只解码 metadata 对象读取 startTime，不反序列化整个文件"""
+    for match in _METADATA_PATTERN.finditer(buf):
+        start = match.end() - 1
+        window = 4096
+        while True:
+            end = min(start + window, len(buf))
+            text = buf[start:end].decode("utf-8", errors="ignore")
+            try:
+                metadata, _ = _DECODER.raw_decode(text)
+                break
+            except json.JSONDecodeError:
+                # 窗口内对象不完整时扩大窗口，已到文件末尾仍失败说明不是合法对象
+                if end == len(buf):
+                    metadata = None
+                    break
+                window *= 4
+        # 嵌套在对话内容里的同名字段不含 startTime，继续查找
+        if isinstance(metadata, dict) and "startTime" in metadata:
+            return metadata["startTime"]
+    return None
+
+
+def _iter_chat(buf: mmap.mmap) -> Iterator[dict]:
+    """逐条解码 chat 数组中的消息"""
+    match = _CHAT_PATTERN.search(buf)
+    if match is None:
+        return
+    text = buf[match.end():].decode("utf-8")
+    pos = _WHITESPACE.match(text, 0).end()
+    while pos < len(text) and text[pos] != "]":
+        msg, pos = _DECODER.raw_decode(text, pos)
+        yield msg
+        pos = _WHITESPACE.match(text, pos).end()
+        if pos < len(text) and text[pos] == ",":
+            pos = _WHITESPACE.match(text, pos + 1).end()
@@ -0,0 +1,188 @@
+"""会话文件清单缓存
+
+各采集器共享的磁盘清单，以 (path, mtime_ns, size) 为键记录每个源文件覆盖的
+日期范围及各日期的会话，未变化的文件无需再次打开。每个源文件一个分片，
+落盘时只重写有变化的记录。
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from mcp_worklog.domain.session import AISession
+
+from .shards import read_shards, write_shard
+
+
+def fingerprint_files(paths: list[Path], target_date: date) -> str:
+    """计算可能包含目标日期的文件的状态指纹
+
+    只 stat 不打开文件；修改时间早于目标日期的文件不影响结果，不计入指纹。
+    """
+    items: list[str] = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if FileManifest.may_contain(stat.st_mtime_ns, target_date):
+            items.append(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}")
+    items.sort()
+    return hashlib.sha1("\n".join(items).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    """单个源文件的清单记录"""
+
+    mtime_ns: int
+    size: int
+    first_date: date | None  # 文件不包含任何会话时为 None
+    last_date: date | None
+    sessions: dict[str, list[AISession]] | None = None  # None 表示只记录了日期范围
+
+    def covers(self, target_date: date) -> bool:
+        """目标日期是否落在文件的日期范围内"""
+        if self.first_date is None or self.last_date is None:
+            return False
+        return self.first_date <= target_date <= self.last_date
+
+    def overlaps(self, start_date: date, end_date: date) -> bool:
+        """日期范围是否与文件的日期范围相交"""
+        if self.first_date is None or self.last_date is None:
+            return False
+        return self.first_date <= end_date and start_date <= self.last_date
+
+    def sessions_for(self, target_date: date) -> list[AISession]:
+        """获取指定日期的会话（需 sessions 已加载）"""
+        return self.sessions_for_key(target_date.isoformat())
+
+    def sessions_for_key(self, day: str) -> list[AISession]:
+        """按 YYYY-MM-DD 键获取会话"""
+        if not self.sessions:
+            return []
+        return self.sessions.get(day, [])
+
+    def to_dict(self) -> dict:
+        return {
+            "mtime_ns": self.mtime_ns,
+            "size": self.size,
+            "first_date": self.first_date.isoformat() if self.first_date else None,
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "sessions": (
+                {k: [s.to_dict() for s in v] for k, v in self.sessions.items()}
+                if self.sessions is not None
+                else None
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ManifestEntry":
+        sessions = data.get("sessions")
+        return cls(
+            mtime_ns=data["mtime_ns"],
+            size=data["size"],
+            first_date=date.fromisoformat(data["first_date"]) if data.get("first_date") else None,
+            last_date=date.fromisoformat(data["last_date"]) if data.get("last_date") else None,
+            sessions=(
+                {k: [AISession.from_dict(s) for s in v] for k, v in sessions.items()}
+                if sessions is not None
+                else None
+            ),
+        )
+
+
+class FileManifest:
+    """源文件清单，directory 为 None 时仅保存在内存中
+
+    多个采集器共享同一实例并可能并行执行，读写均加锁。
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory
+        self._entries: dict[str, ManifestEntry] = {}
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """从磁盘加载清单，损坏的分片视为不存在"""
+        if self.directory is None:
+            return
+        for key, value in read_shards(self.directory):
+            try:
+                self._entries[key] = ManifestEntry.from_dict(value)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    @staticmethod
+    def may_contain(mtime_ns: int, target_date: date) -> bool:
+        """按修改时间判断文件是否可能包含目标日期的会话
+
+        会话时间戳可能是 UTC，与本地修改时间最多相差一天，因此留一天余量。
+        """
+        modified = datetime.fromtimestamp(mtime_ns / 1e9).date()
+        return modified >= target_date - timedelta(days=1)
+
+    def lookup(self, key: str, mtime_ns: int, size: int) -> ManifestEntry | None:
+        """查找与当前文件状态一致的清单记录"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.mtime_ns != mtime_ns or entry.size != size:
+            return None
+        return entry
+
+    def store(
+        self,
+        key: str,
+        mtime_ns: int,
+        size: int,
+        sessions: dict[str, list[AISession]],
+    ) -> ManifestEntry:
+        """记录文件中所有日期的会话"""
+        dates = sorted(sessions)
+        entry = ManifestEntry(
+            mtime_ns=mtime_ns,
+            size=size,
+            first_date=date.fromisoformat(dates[0]) if dates else None,
+            last_date=date.fromisoformat(dates[-1]) if dates else None,
+            sessions=sessions,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty.add(key)
+        return entry
+
+    def store_range(
+        self,
+        key: str,
+        mtime_ns: int,
+        size: int,
+        first_date: date | None,
+        last_date: date | None,
+    ) -> ManifestEntry:
+        """只记录文件的日期范围，会话内容留待真正需要时再解析"""
+        entry = ManifestEntry(
+            mtime_ns=mtime_ns,
+            size=size,
+            first_date=first_date,
+            last_date=last_date,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty.add(key)
+        return entry
+
+    def flush(self) -> None:
+        """只重写有变化的源文件分片"""
+        if self.directory is None:
+            return
+        with self._lock:
+            for key in list(self._dirty):
+                try:
+                    write_shard(self.directory, key, self._entries[key].to_dict())
+                except OSError:
+                    continue
+                self._dirty.discard(key)
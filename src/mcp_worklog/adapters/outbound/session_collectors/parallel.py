@@ -0,0 +1,49 @@
+"""会话采集并行执行
+
+文件读取和 sqlite 查询是 I/O 密集型，使用线程池；JSON 解码是 CPU 密集型，
+可选用进程池。结果始终按输入顺序返回，保证合并结果确定。
+"""
+
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class ParallelOptions:
+    """并行采集配置"""
+
+    max_workers: int = 1  # 1 表示串行执行
+    use_processes: bool = False  # CPU 密集的解析任务是否使用进程池
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 1
+
+
+def map_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    options: ParallelOptions | None = None,
+    cpu_bound: bool = False,
+) -> list[R]:
+    """按输入顺序并行映射
+
+    cpu_bound 为 True 且启用进程池时使用进程池，此时 func 和参数必须可 pickle。
+    """
+    items = list(items)
+    if options is None or not options.enabled or len(items) <= 1:
+        return [func(item) for item in items]
+
+    workers = min(options.max_workers, len(items))
+    executor: Executor
+    if cpu_bound and options.use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        return list(executor.map(func, items))
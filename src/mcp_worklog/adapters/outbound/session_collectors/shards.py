@@ -0,0 +1,47 @@
+"""按源文件分片的 JSON 持久化
+
+检查点和清单按源文件各存一个 JSON 分片，文件名取路径的 SHA1。只有变化的源文件
+需要重写自己的分片，写盘开销与变化的数据量有关，而不是与全部历史成正比。
+分片通过 write_json 原子写入，多个进程共用缓存目录时互不覆盖。
+"""
+
+import hashlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+from ..json_file import write_json
+
+
+def shard_path(directory: Path, key: str) -> Path:
+    """源文件对应的分片路径"""
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return directory / f"{digest}.json"
+
+
+def write_shard(directory: Path, key: str, value: object) -> None:
+    """写入单个源文件的分片"""
+    write_json(shard_path(directory, key), {"key": key, "value": value})
+
+
+def read_shard(directory: Path, key: str) -> dict | None:
+    """读取单个源文件的分片，不存在或损坏时返回 None"""
+    try:
+        data = json.loads(shard_path(directory, key).read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return None
+    if not isinstance(data, dict) or data.get("key") != key:
+        return None
+    return data.get("value")
+
+
+def read_shards(directory: Path) -> Iterator[tuple[str, dict]]:
+    """读取目录下的所有分片，跳过损坏的分片"""
+    if not directory.is_dir():
+        return
+    for path in directory.glob("*.json"):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            yield data["key"], data["value"]
+        except (json.JSONDecodeError, KeyError, TypeError, OSError):
+            continue
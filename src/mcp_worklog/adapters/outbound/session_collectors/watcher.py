@@ -0,0 +1,272 @@
+"""会话目录监听与常驻内存索引
+
+按需扫描的延迟恰好落在用户等待日报的时刻。监听模式下后台线程在源文件变化时
+刷新当天的会话，collect_sessions 查询当天直接读内存。Linux 上通过 ctypes 调用
+inotify，其他平台或 inotify 不可用时退化为定期比较文件状态。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from datetime import date
+from pathlib import Path
+from typing import Protocol
+
+from mcp_worklog.domain.session import AISession
+
+from .cache import FingerprintedCollector
+
+# inotify 事件掩码，见 <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class FileWatcher(Protocol):
+    """目录变化监听器"""
+
+    def wait(self, timeout: float) -> bool:
+        """阻塞至多 timeout 秒，期间有文件变化时返回 True"""
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class PollingWatcher:
+    """轮询监听器：定期比较目录下文件的 (mtime_ns, size)"""
+
+    def __init__(self, paths: Iterable[Path], depth: int = 2) -> None:
+        self.paths = list(paths)
+        self.depth = depth
+        self._state = self._snapshot()
+        self._closed = threading.Event()
+
+    def wait(self, timeout: float) -> bool:
+        if self._closed.wait(timeout):
+            return False
+        state = self._snapshot()
+        changed = state != self._state
+        self._state = state
+        return changed
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        state: dict[str, tuple[int, int]] = {}
+        for path in self.paths:
+            _walk_stats(path, self.depth, state)
+        return state
+
+
+def _walk_stats(directory: Path, depth: int, state: dict[str, tuple[int, int]]) -> None:
+    """收集 depth 层以内所有文件的状态"""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if depth > 1:
+                    _walk_stats(Path(entry.path), depth - 1, state)
+            else:
+                stat = entry.stat()
+                state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            continue
+
+
+class InotifyWatcher:
+    """基于 inotify 的监听器（仅 Linux）
+
+    inotify 不递归，对 depth 层以内的目录逐个添加监听，新建的子目录在事件中补上。
+    """
+
+    def __init__(self, paths: Iterable[Path], depth: int = 2) -> None:
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._dirs: dict[int, tuple[Path, int]] = {}  # wd -> (目录, 剩余深度)
+        for path in paths:
+            self._add_tree(path, depth)
+
+    def wait(self, timeout: float) -> bool:
+        if self._fd < 0:
+            time.sleep(timeout)
+            return False
+        try:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+        except (OSError, ValueError):
+            return False
+        if not ready:
+            return False
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError:  # 包括无更多事件时的 BlockingIOError
+                break
+            if not data:
+                break
+            changed = True
+            self._handle_events(data)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _handle_events(self, data: bytes) -> None:
+        """为新建的子目录补充监听"""
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+            name = data[pos + _EVENT_HEADER.size : pos + _EVENT_HEADER.size + length]
+            pos += _EVENT_HEADER.size + length
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and wd in self._dirs:
+                parent, depth = self._dirs[wd]
+                if depth > 1:
+                    self._add_tree(parent / os.fsdecode(name.rstrip(b"\0")), depth - 1)
+
+    def _add_tree(self, directory: Path, depth: int) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            return
+        self._dirs[wd] = (directory, depth)
+        if depth <= 1:
+            return
+        try:
+            subdirs = [Path(e.path) for e in os.scandir(directory) if e.is_dir(follow_symlinks=False)]
+        except OSError:
+            return
+        for subdir in subdirs:
+            self._add_tree(subdir, depth - 1)
+
+
+def create_watcher(paths: Iterable[Path], depth: int = 2) -> FileWatcher:
+    """优先使用 inotify，不可用时退化为轮询"""
+    paths = [path for path in paths if path.exists()]
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths, depth)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, depth)
+
+
+class WatchingSessionCollector:
+    """常驻内存的会话索引（装饰已有采集器）
+
+    后台线程在源目录变化时清空内存索引并立即重新采集当天；查询命中索引时不访问
+    磁盘。索引按代数保护：采集期间发生变化的结果不写入索引。
+    """
+
+    def __init__(
+        self,
+        inner: FingerprintedCollector,
+        watcher: FileWatcher,
+        poll_interval: float = 2.0,
+        debounce: float = 0.2,
+    ) -> None:
+        self.inner = inner
+        self.watcher = watcher
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._index: dict[date, list[AISession]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """启动后台监听线程，启动时先预热当天的索引"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="session-watcher", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.watcher.close()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def collect(self, target_date: date) -> list[AISession]:
+        """采集指定日期的会话，索引命中时直接返回内存结果"""
+        return self.collect_range(target_date, target_date).get(target_date, [])
+
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        """采集日期范围内的会话，范围内每天都在索引中时不访问磁盘"""
+        days = [
+            date.fromordinal(n) for n in range(start_date.toordinal(), end_date.toordinal() + 1)
+        ]
+        with self._lock:
+            generation = self._generation
+            if all(day in self._index for day in days):
+                return {day: list(self._index[day]) for day in days if self._index[day]}
+        results = self.inner.collect_range(start_date, end_date)
+        self._store(generation, days, results)
+        return results
+
+    def fingerprint(self, target_date: date) -> str:
+        return self.inner.fingerprint(target_date)
+
+    def _store(
+        self, generation: int, days: list[date], results: dict[date, list[AISession]]
+    ) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            for day in days:
+                self._index[day] = list(results.get(day, []))
+
+    def _invalidate(self) -> int:
+        with self._lock:
+            self._generation += 1
+            self._index.clear()
+            return self._generation
+
+    def _refresh_today(self) -> None:
+        today = date.today()
+        generation = self._invalidate()
+        try:
+            results = self.inner.collect_range(today, today)
+        except Exception:
+            # 后台刷新失败不影响查询，下次查询直接走被装饰的采集器
+            return
+        self._store(generation, [today], results)
+
+    def _run(self) -> None:
+        self._refresh_today()
+        last_day = date.today()
+        while not self._stop.is_set():
+            changed = self.watcher.wait(self.poll_interval)
+            if self._stop.is_set():
+                break
+            if changed:
+                # 合并连续写入产生的事件
+                self.watcher.wait(self.debounce)
+            if changed or date.today() != last_day:
+                last_day = date.today()
+                self._refresh_today()
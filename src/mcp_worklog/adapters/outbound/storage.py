@@ -1,19 +1,74 @@
 """出站适配器 - 本地文件存储"""
 
-from datetime import date
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
 from pathlib import Path
 
-from mcp_worklog.domain import DailyDigest, DigestFormatter
+from mcp_worklog.domain import DailyDigest, DigestFormatter, WorkLogEntry
+
+from .archive import MonthArchive
+from .file_lock import file_lock
+
+
+@dataclass
+class _PendingAppend:
+    """等待组提交的追加请求"""
+
+    target_date: date
+    entry: WorkLogEntry
+    result: tuple[Path, int] | None = None
+    error: Exception | None = None
+    done: threading.Event = field(default_factory=threading.Event)
 
 
 class LocalFileStorage:
-    """本地文件存储适配器"""
+    """本地文件存储适配器
+
+    多个进程可以共用同一存储目录：写入前获取按日期划分的建议锁，整体保存时
+    先写临时文件再原子替换，读取方不会看到写了一半的文件。开启 group_commit
+    后，同一进程内并发的追加请求合并为一次写入和一次 fsync。
+
+    解析后的日报按 (mtime_ns, size) 校验后缓存在内存中（最多 cache_size 天），
+    写入时同步更新缓存，连续的读取不再重复读文件和解析。
+
+    已结束的月份可以通过 archive_months 打包到 archive/YYYY-MM.pack，读取时
+    透明地从归档中取出；同一天同时存在日报文件时以日报文件为准。
+    """
 
     FILE_EXTENSION = ".txt"
     DATE_FORMAT = "%Y-%m-%d"
+    LOCK_DIR = ".locks"
+    ARCHIVE_DIR = "archive"
+    ARCHIVE_EXTENSION = ".pack"
 
-    def __init__(self, base_path: Path) -> None:
+    def __init__(
+        self,
+        base_path: Path,
+        group_commit: bool = False,
+        fsync: bool = True,
+        cache_size: int = 32,
+    ) -> None:
         self.base_path = base_path
+        self.group_commit = group_commit
+        self.fsync = fsync
+        self.cache_size = cache_size
+        # 解析结果缓存：日期 -> (mtime_ns, size, 日报)，按最近使用排序
+        self._digests: OrderedDict[date, tuple[int, int, DailyDigest]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # 归档索引缓存：归档路径 -> (mtime_ns, size, 归档)
+        self._archives: dict[Path, tuple[int, int, MonthArchive]] = {}
+        # 每个文件的条目数缓存：日期 -> (mtime_ns, size, 条目数)
+        self._entry_counts: dict[date, tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+        self._pending: list[_PendingAppend] = []
+        self._pending_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
         self._ensure_directory()
 
     def _ensure_directory(self) -> None:
@@ -25,21 +80,530 @@ class LocalFileStorage:
         filename = f"{target_date.strftime(self.DATE_FORMAT)}{self.FILE_EXTENSION}"
         return self.base_path / filename
 
+    def _get_lock_path(self, target_date: date) -> Path:
+        """获取指定日期的锁文件路径"""
+        return self.base_path / self.LOCK_DIR / f"{target_date.strftime(self.DATE_FORMAT)}.lock"
+
+    def _get_archive_path(self, target_date: date) -> Path:
+        """获取指定日期所在月份的归档文件路径"""
+        filename = f"{target_date.strftime('%Y-%m')}{self.ARCHIVE_EXTENSION}"
+        return self.base_path / self.ARCHIVE_DIR / filename
+
+    def _get_archive_lock_path(self, archive_path: Path) -> Path:
+        """获取归档文件的锁文件路径"""
+        return self.base_path / self.LOCK_DIR / f"{archive_path.name}.lock"
+
     def save(self, digest: DailyDigest) -> Path:
-        """保存日报到文件"""
+        """保存日报到文件（临时文件 + 原子替换）"""
+        with self._lock, file_lock(self._get_lock_path(digest.date)):
+            return self._write(digest)
+
+    def update(
+        self,
+        target_date: date,
+        change: Callable[[DailyDigest | None], DailyDigest | None],
+    ) -> bool:
+        """持有日期锁读取、修改并保存日报，返回是否写入
+
+        change 收到当前日报（不存在时为 None），返回要保存的日报，返回 None 表示
+        无需写入。读取到替换之间其他线程和进程的追加都在等待，不会被覆盖。
+        """
+        with self._lock, file_lock(self._get_lock_path(target_date)):
+            digest = change(self._read(target_date, self._get_file_path(target_date), locked=True))
+            if digest is None:
+                return False
+            self._write(digest)
+            return True
+
+    def _write(self, digest: DailyDigest) -> Path:
+        """整体写入日报（调用方持有锁）"""
         file_path = self._get_file_path(digest.date)
         content = DigestFormatter.format(digest)
-        file_path.write_text(content, encoding="utf-8")
+        tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        stat = file_path.stat()
+        self._entry_counts[digest.date] = (
+            stat.st_mtime_ns,
+            stat.st_size,
+            DigestFormatter.count_entries(content),
+        )
+        # 重新解析一次，保证缓存与从文件读取的结果一致（如内容中的换行）
+        self._remember(digest.date, stat, DigestFormatter.parse(content, digest.date))
         return file_path
 
+    def append(self, target_date: date, entry: WorkLogEntry) -> tuple[Path, int]:
+        """只写入新的编号行，条目数取自缓存，文件被外部修改时重新统计
+
+        写入结果与整体格式化后保存的内容一致，parse 结果相同。
+        """
+        request = _PendingAppend(target_date, entry)
+        if not self.group_commit:
+            self._commit([request])
+        else:
+            with self._pending_lock:
+                self._pending.append(request)
+            # 获得提交锁的线程把排队中的请求一并提交，其他线程等待期间请求已被处理
+            with self._commit_lock:
+                if not request.done.is_set():
+                    with self._pending_lock:
+                        batch, self._pending = self._pending, []
+                    self._commit(batch)
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _commit(self, batch: list[_PendingAppend]) -> None:
+        """按日期把一批追加请求写入文件，每个日期一次写入、一次 fsync"""
+        by_date: dict[date, list[_PendingAppend]] = {}
+        for request in batch:
+            by_date.setdefault(request.target_date, []).append(request)
+        for target_date, requests in by_date.items():
+            try:
+                self._append_lines(target_date, requests)
+            except Exception as e:
+                for request in requests:
+                    request.error = e
+            finally:
+                for request in requests:
+                    request.done.set()
+
+    def _append_lines(self, target_date: date, requests: list[_PendingAppend]) -> None:
+        file_path = self._get_file_path(target_date)
+        with self._lock, file_lock(self._get_lock_path(target_date)):
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                stat = self._restore_archived(target_date, file_path)
+            count = self._entry_count(target_date, file_path, stat)
+            previous = self._cached(target_date, stat) if stat is not None else None
+
+            # 空日报格式化为 "日期\n"，之后每条记录都以换行开头
+            parts: list[str] = []
+            if stat is None or stat.st_size == 0:
+                parts.append(DigestFormatter.format(DailyDigest.empty(target_date)))
+            numbers: list[int] = []
+            for request in requests:
+                line = DigestFormatter.format_entry(count + 1, request.entry.content)
+                parts.append("\n" + line)
+                numbers.append(count + 1)
+                count += DigestFormatter.count_entries(line)
+
+            text = "".join(parts)
+            with file_path.open("a", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            stat = file_path.stat()
+            self._entry_counts[target_date] = (stat.st_mtime_ns, stat.st_size, count)
+            # 各行独立解析，已缓存的日报加上新增部分的解析结果即为整个文件的解析结果
+            if previous is not None or len(parts) > len(requests):
+                digest = previous or DailyDigest.empty(target_date)
+                digest.entries.extend(DigestFormatter.parse(text, target_date).entries)
+                self._remember(target_date, stat, digest)
+        for request, number in zip(requests, numbers):
+            request.result = (file_path, number)
+
+    def _entry_count(
+        self, target_date: date, file_path: Path, stat: os.stat_result | None
+    ) -> int:
+        """当前文件中的条目数（调用方持有锁）"""
+        if stat is None:
+            return 0
+        cached = self._entry_counts.get(target_date)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        return DigestFormatter.count_entries(file_path.read_text(encoding="utf-8"))
+
+    def _restore_archived(self, target_date: date, file_path: Path) -> os.stat_result | None:
+        """追加到已归档的日期前，先把归档中的内容还原为日报文件（调用方持有锁）"""
+        found = self._open_archive(target_date)
+        if found is None:
+            return None
+        text = found[1].read(target_date)
+        if text is None:
+            return None
+        file_path.write_text(text, encoding="utf-8")
+        return file_path.stat()
+
     def load(self, target_date: date) -> DailyDigest | None:
         """加载指定日期的日报"""
-        file_path = self._get_file_path(target_date)
-        if not file_path.exists():
+        return self._read(target_date, self._get_file_path(target_date))
+
+    def _read(
+        self, target_date: date, file_path: Path, locked: bool = False
+    ) -> DailyDigest | None:
+        """读取并解析日报文件，文件未变化时直接返回缓存
+
+        locked 表示调用方已持有该日期的排他锁，不再获取共享锁。
+        """
+        try:
+            cached = self._cached(target_date, file_path.stat())
+        except FileNotFoundError:
+            return self._read_archived(target_date)
+        if cached is not None:
+            return cached
+        # 共享锁：不会读到其他进程追加了一半的内容
+        lock = nullcontext() if locked else file_lock(self._get_lock_path(target_date), shared=True)
+        with lock:
+            try:
+                content = file_path.read_text(encoding="utf-8")
+                stat = file_path.stat()
+            except FileNotFoundError:
+                return None
+        digest = DigestFormatter.parse(content, target_date)
+        self._remember(target_date, stat, digest)
+        return DailyDigest(date=digest.date, entries=list(digest.entries))
+
+    def _read_archived(self, target_date: date) -> DailyDigest | None:
+        """从月度归档中读取日报，缓存以归档文件的状态校验"""
+        found = self._open_archive(target_date)
+        if found is None or target_date not in found[1].index:
+            return None
+        stat, archive = found
+        cached = self._cached(target_date, stat)
+        if cached is not None:
+            return cached
+        text = archive.read(target_date)
+        if text is None:
+            return None
+        digest = DigestFormatter.parse(text, target_date)
+        self._remember(target_date, stat, digest)
+        return DailyDigest(date=digest.date, entries=list(digest.entries))
+
+    def _open_archive(
+        self, target_date: date, archive_path: Path | None = None
+    ) -> tuple[os.stat_result, MonthArchive] | None:
+        """打开日期所在月份的归档，索引按文件状态缓存"""
+        archive_path = archive_path or self._get_archive_path(target_date)
+        try:
+            stat = archive_path.stat()
+        except FileNotFoundError:
             return None
-        content = file_path.read_text(encoding="utf-8")
-        return DigestFormatter.parse(content, target_date)
+        with self._cache_lock:
+            cached = self._archives.get(archive_path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return stat, cached[2]
+        try:
+            archive = MonthArchive.open(archive_path)
+        except (OSError, ValueError):
+            return None
+        with self._cache_lock:
+            self._archives[archive_path] = (stat.st_mtime_ns, stat.st_size, archive)
+        return stat, archive
+
+    def _cached(self, target_date: date, stat: os.stat_result) -> DailyDigest | None:
+        """文件状态与缓存一致时返回缓存日报的副本"""
+        with self._cache_lock:
+            cached = self._digests.get(target_date)
+            if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+                return None
+            self._digests.move_to_end(target_date)
+            digest = cached[2]
+        return DailyDigest(date=digest.date, entries=list(digest.entries))
+
+    def _remember(self, target_date: date, stat: os.stat_result, digest: DailyDigest) -> None:
+        """写入缓存，超过 cache_size 时淘汰最久未使用的日期"""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._digests[target_date] = (stat.st_mtime_ns, stat.st_size, digest)
+            self._digests.move_to_end(target_date)
+            while len(self._digests) > self.cache_size:
+                self._digests.popitem(last=False)
 
     def exists(self, target_date: date) -> bool:
         """检查指定日期的日报是否存在"""
-        return self._get_file_path(target_date).exists()
+        if self._get_file_path(target_date).exists():
+            return True
+        found = self._open_archive(target_date)
+        return found is not None and target_date in found[1].index
+
+    def load_range(self, start_date: date, end_date: date) -> dict[date, DailyDigest]:
+        """加载日期范围内的所有日报，只扫描一次目录，每个归档只打开一次"""
+        digests: dict[date, DailyDigest] = {}
+        for target_date, file_path in self._scan_files():
+            if not start_date <= target_date <= end_date:
+                continue
+            digest = self._read(target_date, file_path)
+            if digest is not None:
+                digests[target_date] = digest
+
+        for stat, archive in self._scan_archives():
+            pending: list[date] = []
+            for target_date in archive.index:
+                if not start_date <= target_date <= end_date or target_date in digests:
+                    continue
+                cached = self._cached(target_date, stat)
+                if cached is not None:
+                    digests[target_date] = cached
+                else:
+                    pending.append(target_date)
+            parsed = DigestFormatter.parse_many(archive.read_many(pending))
+            for target_date, digest in parsed.items():
+                self._remember(target_date, stat, digest)
+                digests[target_date] = DailyDigest(date=target_date, entries=list(digest.entries))
+        return dict(sorted(digests.items()))
+
+    def list_dates(self) -> list[date]:
+        """列出所有已存储日报的日期（升序），包括已归档的日期"""
+        dates = {target_date for target_date, _ in self._scan_files()}
+        for _, archive in self._scan_archives():
+            dates.update(archive.index)
+        return sorted(dates)
+
+    def archive_months(self, before: date | None = None) -> int:
+        """把 before（默认本月 1 日）之前各月的日报文件打包归档，返回归档的天数
+
+        已有归档时与之合并。打包后删除日报文件；打包期间被修改的文件保留，
+        读取时仍以日报文件为准，下次归档再合并。每个月的读取、合并、写入和删除
+        都持有该月归档的排他锁，多个进程同时归档时不会用旧归档覆盖新归档。
+        """
+        cutoff = before or date.today().replace(day=1)
+        by_month: dict[Path, list[tuple[date, Path]]] = {}
+        for target_date, file_path in self._scan_files():
+            if target_date < cutoff:
+                by_month.setdefault(self._get_archive_path(target_date), []).append(
+                    (target_date, file_path)
+                )
+
+        archived = 0
+        for archive_path, files in by_month.items():
+            with file_lock(self._get_archive_lock_path(archive_path)):
+                archived += self._archive_month(archive_path, files)
+        return archived
+
+    def _archive_month(self, archive_path: Path, files: list[tuple[date, Path]]) -> int:
+        """合并一个月的归档（调用方持有归档锁）"""
+        # 取得锁后重新打开归档，其他进程可能刚写入了新归档并删除了日报文件
+        try:
+            archive = MonthArchive.open(archive_path)
+            texts = archive.read_many(list(archive.index))
+        except FileNotFoundError:
+            texts = {}
+        read: list[tuple[date, Path, os.stat_result]] = []
+        for target_date, file_path in files:
+            with file_lock(self._get_lock_path(target_date), shared=True):
+                try:
+                    texts[target_date] = file_path.read_text(encoding="utf-8")
+                    read.append((target_date, file_path, file_path.stat()))
+                except FileNotFoundError:
+                    continue
+        if not read:
+            return 0
+        MonthArchive.write(archive_path, texts)
+
+        archived = 0
+        for target_date, file_path, stat in read:
+            with self._lock, file_lock(self._get_lock_path(target_date)):
+                try:
+                    current = file_path.stat()
+                except FileNotFoundError:
+                    continue
+                if (current.st_mtime_ns, current.st_size) == (stat.st_mtime_ns, stat.st_size):
+                    file_path.unlink()
+                    archived += 1
+        return archived
+
+    def _scan_archives(self) -> list[tuple[os.stat_result, MonthArchive]]:
+        """扫描归档目录，返回所有可读的归档"""
+        archive_dir = self.base_path / self.ARCHIVE_DIR
+        if not archive_dir.is_dir():
+            return []
+        archives = []
+        for archive_path in sorted(archive_dir.glob(f"*{self.ARCHIVE_EXTENSION}")):
+            found = self._open_archive(date.min, archive_path)
+            if found is not None:
+                archives.append(found)
+        return archives
+
+    def _scan_files(self) -> list[tuple[date, Path]]:
+        """扫描存储目录，返回按日期升序的日报文件"""
+        files: list[tuple[date, Path]] = []
+        with os.scandir(self.base_path) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext != self.FILE_EXTENSION or not entry.is_file():
+                    continue
+                try:
+                    target_date = datetime.strptime(stem, self.DATE_FORMAT).date()
+                except ValueError:
+                    continue
+                files.append((target_date, Path(entry.path)))
+        return sorted(files)
+
+
+# SQL 语句保持为常量字符串，sqlite3 的语句缓存会复用已编译的预处理语句
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL REFERENCES days(date),
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_date ON entries(date, position);
+"""
+_INSERT_DAY = "INSERT OR IGNORE INTO days (date) VALUES (?)"
+_INSERT_ENTRY = "INSERT INTO entries (date, position, content, created_at) VALUES (?, ?, ?, ?)"
+_DELETE_ENTRIES = "DELETE FROM entries WHERE date = ?"
+_COUNT_ENTRIES = "SELECT COUNT(*) FROM entries WHERE date = ?"
+_DAY_EXISTS = "SELECT 1 FROM days WHERE date = ?"
+_SELECT_ALL_DAYS = "SELECT date FROM days ORDER BY date"
+_SELECT_DAYS = "SELECT date FROM days WHERE date BETWEEN ? AND ? ORDER BY date"
+_SELECT_RANGE = (
+    "SELECT date, content, created_at FROM entries "
+    "WHERE date BETWEEN ? AND ? ORDER BY date, position"
+)
+
+
+class SqliteStorage:
+    """SQLite 存储适配器
+
+    条目按日期建立索引并保留 created_at（文本格式无法保存）。数据库使用 WAL 模式，
+    多个进程可以同时读取，写入通过 busy_timeout 排队。
+    """
+
+    DB_FILE = "worklog.db"
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            db_path, isolation_level=None, check_same_thread=False, timeout=30
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def save(self, digest: DailyDigest) -> Path:
+        """整体替换指定日期的条目"""
+        with self._transaction() as conn:
+            self._replace(conn, digest)
+        return self.db_path
+
+    def update(
+        self,
+        target_date: date,
+        change: Callable[[DailyDigest | None], DailyDigest | None],
+    ) -> bool:
+        """在同一个写事务中读取、修改并保存日报，返回是否写入"""
+        key = target_date.isoformat()
+        with self._transaction() as conn:
+            digest = change(self._select(conn, (key, key)).get(target_date))
+            if digest is None:
+                return False
+            self._replace(conn, digest)
+            return True
+
+    @staticmethod
+    def _replace(conn: sqlite3.Connection, digest: DailyDigest) -> None:
+        key = digest.date.isoformat()
+        conn.execute(_INSERT_DAY, (key,))
+        conn.execute(_DELETE_ENTRIES, (key,))
+        conn.executemany(
+            _INSERT_ENTRY,
+            [
+                (key, position, entry.content, entry.created_at.isoformat())
+                for position, entry in enumerate(digest.entries, start=1)
+            ],
+        )
+
+    def append(self, target_date: date, entry: WorkLogEntry) -> tuple[Path, int]:
+        """追加一条记录，返回 (数据库路径, 条目编号)"""
+        key = target_date.isoformat()
+        with self._transaction() as conn:
+            conn.execute(_INSERT_DAY, (key,))
+            number = conn.execute(_COUNT_ENTRIES, (key,)).fetchone()[0] + 1
+            conn.execute(_INSERT_ENTRY, (key, number, entry.content, entry.created_at.isoformat()))
+        return self.db_path, number
+
+    def load(self, target_date: date) -> DailyDigest | None:
+        """加载指定日期的日报"""
+        return self.load_range(target_date, target_date).get(target_date)
+
+    def load_range(self, start_date: date, end_date: date) -> dict[date, DailyDigest]:
+        """在一个读事务中加载日期范围内的所有日报"""
+        with self._lock:
+            # 读事务保证日期和条目来自同一快照，期间其他进程新增的日期不会只出现在条目中
+            self._conn.execute("BEGIN")
+            try:
+                return self._select(self._conn, (start_date.isoformat(), end_date.isoformat()))
+            finally:
+                self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _select(conn: sqlite3.Connection, bounds: tuple[str, str]) -> dict[date, DailyDigest]:
+        """查询日期和条目（调用方在事务中调用）"""
+        days = conn.execute(_SELECT_DAYS, bounds).fetchall()
+        rows = conn.execute(_SELECT_RANGE, bounds).fetchall()
+        digests = {
+            date.fromisoformat(key): DailyDigest.empty(date.fromisoformat(key)) for (key,) in days
+        }
+        for key, content, created_at in rows:
+            digests[date.fromisoformat(key)].append(
+                WorkLogEntry(content=content, created_at=datetime.fromisoformat(created_at))
+            )
+        return digests
+
+    def exists(self, target_date: date) -> bool:
+        """检查指定日期的日报是否存在"""
+        with self._lock:
+            return self._conn.execute(_DAY_EXISTS, (target_date.isoformat(),)).fetchone() is not None
+
+    def list_dates(self) -> list[date]:
+        """列出所有已存储日报的日期（升序）"""
+        with self._lock:
+            rows = self._conn.execute(_SELECT_ALL_DAYS).fetchall()
+        return [date.fromisoformat(key) for (key,) in rows]
+
+    def import_files(self, source: LocalFileStorage) -> int:
+        """一次性导入文本日报，已存在的日期不覆盖，返回导入的天数
+
+        文本格式不含创建时间，导入的条目 created_at 记为当天零点。
+        """
+        imported = 0
+        for target_date in source.list_dates():
+            if self.exists(target_date):
+                continue
+            digest = source.load(target_date)
+            if digest is None:
+                continue
+            midnight = datetime.combine(target_date, time.min)
+            self.save(
+                DailyDigest(
+                    date=target_date,
+                    entries=[
+                        WorkLogEntry(content=e.content, created_at=midnight)
+                        for e in digest.entries
+                    ],
+                )
+            )
+            imported += 1
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务：BEGIN IMMEDIATE 立即获取写锁，避免并发追加得到相同编号"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
@@ -1,17 +1,43 @@
 """应用层 - 用例编排，连接领域与端口"""
 
-from .models import AppendResult, DigestResult, PolishResult, RewriteResult, SessionCollectResult
-from .ports import StoragePort
+from .models import (
+    AppendResult,
+    DigestResult,
+    PolishResult,
+    PolishState,
+    RangeDigestResult,
+    RewriteResult,
+    SearchHit,
+    SearchResult,
+    SessionCollectResult,
+    SessionRangeResult,
+)
+from .pagination import SessionPaginator
+from .ports import PolishStatePort, SearchIndexPort, StoragePort
 from .service import WorklogService
-from .session_ports import SessionCollectorPort
+from .session_ports import (
+    AsyncCollectorAdapter,
+    AsyncSessionCollectorPort,
+    SessionCollectorPort,
+)
 
 __all__ = [
     "WorklogService",
     "StoragePort",
+    "SearchIndexPort",
+    "PolishStatePort",
     "SessionCollectorPort",
+    "AsyncSessionCollectorPort",
+    "AsyncCollectorAdapter",
+    "SessionPaginator",
     "AppendResult",
     "DigestResult",
     "PolishResult",
+    "PolishState",
+    "RangeDigestResult",
     "RewriteResult",
+    "SearchHit",
+    "SearchResult",
     "SessionCollectResult",
+    "SessionRangeResult",
 ]
@@ -25,6 +25,16 @@ class DigestResult:
     found: bool
 
 
+@dataclass
+class RangeDigestResult:
+    """获取多日日报的结果"""
+
+    start_date: str
+    end_date: str
+    days: list[DigestResult]  # 只包含存在日报的日期，按日期升序
+    entry_count: int
+
+
 @dataclass
 class PolishResult:
     """润色日报的结果"""
@@ -36,6 +46,33 @@ class PolishResult:
     polished_count: int
 
 
+@dataclass
+class PolishState:
+    """某天日报的润色水位，下次润色只需处理之后追加的条目"""
+
+    entry_count: int  # 已润色的条目数
+    prefix_hash: str  # 已润色条目整体的哈希，用于发现重写或外部修改
+    content_hashes: set[str]  # 已润色条目的内容哈希
+    merged: bool = False  # 已润色条目是否也合并过相似条目
+
+    def to_dict(self) -> dict:
+        return {
+            "entry_count": self.entry_count,
+            "prefix_hash": self.prefix_hash,
+            "content_hashes": sorted(self.content_hashes),
+            "merged": self.merged,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PolishState":
+        return cls(
+            entry_count=data["entry_count"],
+            prefix_hash=data["prefix_hash"],
+            content_hashes=set(data["content_hashes"]),
+            merged=data.get("merged", False),
+        )
+
+
 @dataclass
 class SessionCollectResult:
     """会话采集结果"""
@@ -45,6 +82,16 @@ class SessionCollectResult:
     total_count: int
 
 
+@dataclass
+class SessionRangeResult:
+    """日期范围会话采集结果"""
+
+    start_date: str
+    end_date: str
+    days: list[SessionCollectResult]  # 只包含有会话的日期，按日期升序
+    total_count: int
+
+
 @dataclass
 class RewriteResult:
     """重写日报的结果"""
@@ -54,3 +101,22 @@ class RewriteResult:
     content: str
     entry_count: int
     message: str
+
+
+@dataclass
+class SearchHit:
+    """检索命中的日报条目"""
+
+    date: str
+    entry_number: int
+    content: str
+    score: float
+
+
+@dataclass
+class SearchResult:
+    """日报检索结果"""
+
+    query: str
+    hits: list[SearchHit]  # 按相关度降序
+    total_count: int
@@ -0,0 +1,225 @@
+"""会话消息分页 - 基于快照的服务端分页"""
+
+import math
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from mcp_worklog.domain.similarity import NearDuplicateFilter
+
+_CJK = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+_ELLIPSIS = " … "
+
+
+class TokenEstimator(Protocol):
+    """文本长度估算器，返回值与分页预算使用同一单位"""
+
+    def __call__(self, text: str) -> int:
+        ...
+
+
+def estimate_chars(text: str) -> int:
+    """按字符数估算"""
+    return len(text)
+
+
+def estimate_tokens(text: str) -> int:
+    """离线估算 token 数：中日韩字符各计 1 个，其余字符约 4 个计 1 个"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+ESTIMATORS: dict[str, TokenEstimator] = {
+    "chars": estimate_chars,
+    "tokens": estimate_tokens,
+}
+
+
+def truncate_middle(text: str, limit: int, estimator: TokenEstimator = estimate_tokens) -> str:
+    """超出预算时保留开头和结尾、省略中间
+
+    长消息的开头通常是意图，结尾通常是具体问题或报错，两端比中间更有信息量。
+    """
+    if estimator(text) <= limit:
+        return text
+    # 二分查找能放进预算的最大保留字符数
+    lo, hi = 0, len(text)
+    while lo < hi:
+        keep = (lo + hi + 1) // 2
+        if estimator(_join_ends(text, keep)) <= limit:
+            lo = keep
+        else:
+            hi = keep - 1
+    return _join_ends(text, lo)
+
+
+def _join_ends(text: str, keep: int) -> str:
+    """保留开头 2/3、结尾 1/3 共 keep 个字符"""
+    head = keep * 2 // 3
+    tail = keep - head
+    return text[:head].rstrip() + _ELLIPSIS + text[len(text) - tail :].lstrip()
+
+
+@dataclass
+class MessageSnapshot:
+    """一次采集得到的去重消息快照，后续翻页都读取同一份数据"""
+
+    cursor: str
+    key: str  # 日期或日期范围
+    messages: list[str]
+    created_at: float
+    page_starts: list[int] = field(default_factory=list)  # 每页第一条消息的下标
+
+    @property
+    def total_messages(self) -> int:
+        return len(self.messages)
+
+
+@dataclass
+class MessagePage:
+    """快照中的一页消息"""
+
+    cursor: str
+    key: str
+    page: int
+    total_pages: int
+    total_messages: int
+    messages: list[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.total_pages
+
+
+# 不按预算分页（固定 page_size 条一页）时，单条消息默认最多保留的字符数
+FIXED_PAGE_MESSAGE_CHARS = 200
+
+
+class SessionPaginator:
+    """会话消息分页器
+
+    第一页时构建去重快照并分配游标，之后按游标取页，新出现的会话不会让页边界
+    移动；快照超过 ttl_seconds 后过期。指定 near_duplicates 时，精确去重后再
+    折叠近似重复的消息。
+
+    指定 page_budget 时按估算器累计长度切页（同时不超过 page_size 条），
+    单条超出 message_budget 的消息截断中间部分。不指定 page_budget 时单条消息
+    默认按 FIXED_PAGE_MESSAGE_CHARS 个字符截断，保证固定条数的一页不会过长。
+    """
+
+    def __init__(
+        self,
+        page_size: int = 50,
+        ttl_seconds: float = 600,
+        max_snapshots: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+        near_duplicates: NearDuplicateFilter | None = None,
+        page_budget: int | None = None,
+        message_budget: int | None = None,
+        estimator: TokenEstimator = estimate_tokens,
+    ) -> None:
+        self.page_size = page_size
+        self.ttl_seconds = ttl_seconds
+        self.max_snapshots = max_snapshots
+        self._clock = clock
+        self.near_duplicates = near_duplicates
+        self.page_budget = page_budget
+        self.estimator = estimator
+        self._message_estimator = estimator
+        if message_budget is None:
+            if page_budget is not None:
+                # 默认单条消息最多占一页预算的四分之一
+                message_budget = max(1, page_budget // 4)
+            else:
+                message_budget = FIXED_PAGE_MESSAGE_CHARS
+                self._message_estimator = estimate_chars
+        self.message_budget = message_budget
+        self._snapshots: OrderedDict[str, MessageSnapshot] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        key: str,
+        messages: Iterable[str],
+        compare_key: Callable[[str], str] | None = None,
+    ) -> MessageSnapshot:
+        """构建快照，按首次出现顺序哈希去重
+
+        compare_key 指定近似重复比较时使用的文本，例如去掉日期标注。
+        """
+        unique = list(dict.fromkeys(messages))
+        if self.near_duplicates is not None:
+            unique = self.near_duplicates.filter(unique, compare_key)
+        unique = [
+            truncate_middle(msg, self.message_budget, self._message_estimator) for msg in unique
+        ]
+        snapshot = MessageSnapshot(
+            cursor=secrets.token_hex(4),
+            key=key,
+            messages=unique,
+            created_at=self._clock(),
+            page_starts=self._page_starts(unique),
+        )
+        with self._lock:
+            self._expire()
+            self._snapshots[snapshot.cursor] = snapshot
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, cursor: str | None, key: str | None = None) -> MessageSnapshot | None:
+        """按游标获取未过期的快照，指定 key 时还需与快照的日期一致"""
+        if not cursor:
+            return None
+        with self._lock:
+            self._expire()
+            snapshot = self._snapshots.get(cursor)
+        if snapshot is None or (key is not None and snapshot.key != key):
+            return None
+        return snapshot
+
+    def page(self, snapshot: MessageSnapshot, page: int) -> MessagePage:
+        """从快照中切出一页"""
+        starts = snapshot.page_starts
+        total_pages = len(starts)
+        messages: list[str] = []
+        if 1 <= page <= total_pages:
+            end = starts[page] if page < total_pages else snapshot.total_messages
+            messages = snapshot.messages[starts[page - 1] : end]
+        return MessagePage(
+            cursor=snapshot.cursor,
+            key=snapshot.key,
+            page=page,
+            total_pages=total_pages,
+            total_messages=snapshot.total_messages,
+            messages=messages,
+        )
+
+    def _page_starts(self, messages: list[str]) -> list[int]:
+        """计算每页第一条消息的下标，每页至少一条消息"""
+        if self.page_budget is None:
+            return list(range(0, len(messages), self.page_size))
+        starts: list[int] = []
+        used = count = 0
+        for i, msg in enumerate(messages):
+            cost = self.estimator(msg)
+            if not starts or count >= self.page_size or used + cost > self.page_budget:
+                starts.append(i)
+                used = count = 0
+            used += cost
+            count += 1
+        return starts
+
+    def _expire(self) -> None:
+        """清理过期快照（调用方持有锁）"""
+        deadline = self._clock() - self.ttl_seconds
+        while self._snapshots:
+            oldest = next(iter(self._snapshots.values()))
+            if oldest.created_at > deadline:
+                break
+            self._snapshots.popitem(last=False)
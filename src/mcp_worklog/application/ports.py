@@ -1,11 +1,14 @@
 """端口定义 - 出站端口接口"""
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from datetime import date
 from pathlib import Path
 from typing import Protocol
 
-from mcp_worklog.domain import DailyDigest
+from mcp_worklog.domain import DailyDigest, WorkLogEntry
+
+from .models import PolishState, SearchHit
 
 
 class StoragePort(Protocol):
@@ -15,10 +18,62 @@ class StoragePort(Protocol):
         """保存日报，返回文件路径"""
         ...
 
+    def append(self, target_date: date, entry: WorkLogEntry) -> tuple[Path, int]:
+        """在日报末尾追加一条记录，返回 (文件路径, 条目编号)，不重写已有内容"""
+        ...
+
+    def update(
+        self,
+        target_date: date,
+        change: Callable[[DailyDigest | None], DailyDigest | None],
+    ) -> bool:
+        """持有该日期的写锁读取、修改并保存日报，change 返回 None 时不写入，返回是否写入"""
+        ...
+
     def load(self, target_date: date) -> DailyDigest | None:
         """加载指定日期的日报，不存在返回 None"""
         ...
 
+    def load_range(self, start_date: date, end_date: date) -> dict[date, DailyDigest]:
+        """批量加载日期范围内的日报，只包含存在的日期，按日期升序"""
+        ...
+
+    def list_dates(self) -> list[date]:
+        """列出所有已存储日报的日期（升序）"""
+        ...
+
     def exists(self, target_date: date) -> bool:
         """检查指定日期的日报是否存在"""
         ...
+
+
+class SearchIndexPort(Protocol):
+    """检索索引端口 - 日报全文检索抽象"""
+
+    def update(self, digest: DailyDigest) -> None:
+        """用指定日期的最新日报替换该日期的索引"""
+        ...
+
+    def add_entry(self, target_date: date, position: int, content: str) -> bool:
+        """把追加的一条记录写入索引；该日期尚未建立索引时返回 False，需要整体 update"""
+        ...
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """按相关度降序返回命中的条目"""
+        ...
+
+    def indexed_dates(self) -> set[date]:
+        """已建立索引的日期"""
+        ...
+
+
+class PolishStatePort(Protocol):
+    """润色水位端口 - 按天持久化上次润色的结果摘要"""
+
+    def load(self, target_date: date) -> PolishState | None:
+        """读取指定日期的润色水位，不存在或损坏返回 None"""
+        ...
+
+    def save(self, target_date: date, state: PolishState) -> None:
+        """保存指定日期的润色水位"""
+        ...
@@ -1,12 +1,39 @@
 """应用服务 - WorklogService"""
 
-from datetime import date
+import asyncio
+import hashlib
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any
 
-from mcp_worklog.domain import DailyDigest, DigestFormatter, WorkLogEntry
+from mcp_worklog.domain import (
+    AISession,
+    DailyDigest,
+    DigestFormatter,
+    EntryMerger,
+    WorkLogEntry,
+)
 
-from .models import AppendResult, DigestResult, PolishResult, RewriteResult, SessionCollectResult
-from .ports import StoragePort
-from .session_ports import SessionCollectorPort
+from .models import (
+    AppendResult,
+    DigestResult,
+    PolishResult,
+    PolishState,
+    RangeDigestResult,
+    RewriteResult,
+    SearchResult,
+    SessionCollectResult,
+    SessionRangeResult,
+)
+from .ports import PolishStatePort, SearchIndexPort, StoragePort
+from .session_ports import (
+    AsyncCollectorAdapter,
+    AsyncSessionCollectorPort,
+    SessionCollectorPort,
+    is_async_collector,
+    merge_sessions,
+)
 
 
 class WorklogService:
@@ -15,10 +42,25 @@ class WorklogService:
     def __init__(
         self,
         storage: StoragePort,
-        session_collectors: list[SessionCollectorPort] | None = None,
+        session_collectors: list[SessionCollectorPort | AsyncSessionCollectorPort] | None = None,
+        max_workers: int = 1,
+        max_concurrency: int = 4,
+        search_index: SearchIndexPort | None = None,
+        entry_merger: EntryMerger | None = None,
+        polish_state: PolishStatePort | None = None,
     ) -> None:
         self.storage = storage
+        self.search_index = search_index
+        self.polish_state = polish_state  # 润色水位，为 None 时每次润色全量处理
+        self.entry_merger = entry_merger or EntryMerger()  # polish_digest 本地合并相似条目
         self.session_collectors = session_collectors or []
+        self.max_workers = max_workers  # 大于 1 时并行执行各采集器
+        self.max_concurrency = max_concurrency  # 异步采集时同时运行的采集器上限
+        # 异步采集时同步采集器通过适配器在线程中运行
+        self._async_collectors: list[AsyncSessionCollectorPort] = [
+            c if is_async_collector(c) else AsyncCollectorAdapter(c)
+            for c in self.session_collectors
+        ]
 
     def append_worklog(self, summary: str) -> AppendResult:
         """追加工作记录到当天日报"""
@@ -30,19 +72,17 @@ class WorklogService:
                 message="工作记录内容不能为空",
             )
 
+        # 只取一次日期，跨过零点时追加和更新索引仍是同一天
         today = date.today()
-        digest = self.storage.load(today) or DailyDigest.empty(today)
-
         entry = WorkLogEntry(content=summary.strip())
-        digest.append(entry)
-
-        file_path = self.storage.save(digest)
+        file_path, entry_number = self.storage.append(today, entry)
+        self._index_entry(today, entry_number, entry.content)
 
         return AppendResult(
             success=True,
             file_path=str(file_path),
-            entry_number=digest.entry_count,
-            message=f"已添加第 {digest.entry_count} 条工作记录",
+            entry_number=entry_number,
+            message=f"已添加第 {entry_number} 条工作记录",
         )
 
     def get_daily_digest(self, target_date: date | None = None) -> DigestResult:
@@ -66,12 +106,48 @@ class WorklogService:
             found=True,
         )
 
-    def polish_digest(self, target_date: date | None = None) -> PolishResult:
-        """润色当天日报（基础版本：重新编号）"""
+    def get_range_digest(self, start_date: date, end_date: date) -> RangeDigestResult:
+        """一次获取日期范围内的所有日报"""
+        digests = self.storage.load_range(start_date, end_date)
+        days = [
+            DigestResult(
+                date=day.strftime("%Y-%m-%d"),
+                content=DigestFormatter.format(digest),
+                entry_count=digest.entry_count,
+                found=True,
+            )
+            for day, digest in sorted(digests.items())
+        ]
+        return RangeDigestResult(
+            start_date=start_date.strftime("%Y-%m-%d"),
+            end_date=end_date.strftime("%Y-%m-%d"),
+            days=days,
+            entry_count=sum(d.entry_count for d in days),
+        )
+
+    def polish_digest(
+        self, target_date: date | None = None, merge_similar: bool = False
+    ) -> PolishResult:
+        """润色当天日报：去重、重新编号，merge_similar 时在本地合并相似条目"""
         target = target_date or date.today()
-        digest = self.storage.load(target)
+        original_count = 0
+        polished: tuple[DailyDigest, PolishState] | None = None
 
-        if digest is None:
+        def polish(digest: DailyDigest | None) -> DailyDigest | None:
+            nonlocal original_count, polished
+            if digest is None:
+                return None
+            original_count = digest.entry_count
+            polished = self._polish(digest, merge_similar)
+            # 内容没有变化时不重写文件
+            if polished[0].get_entry_contents() == digest.get_entry_contents():
+                return None
+            return polished[0]
+
+        # 读取到保存之间持有日期锁，其他进程在此期间的追加不会被覆盖
+        if self.storage.update(target, polish):
+            self._reindex(target)
+        if polished is None:
             return PolishResult(
                 success=False,
                 date=target.strftime("%Y-%m-%d"),
@@ -80,20 +156,9 @@ class WorklogService:
                 polished_count=0,
             )
 
-        original_count = digest.entry_count
-
-        # 基础润色：去重、重新编号
-        seen_contents: set[str] = set()
-        unique_entries: list[WorkLogEntry] = []
-        for entry in digest.entries:
-            normalized = entry.content.strip()
-            if normalized not in seen_contents:
-                seen_contents.add(normalized)
-                unique_entries.append(WorkLogEntry(content=normalized))
-
-        polished_digest = DailyDigest(date=target, entries=unique_entries)
-        self.storage.save(polished_digest)
-
+        polished_digest, state = polished
+        if self.polish_state is not None:
+            self.polish_state.save(target, state)
         content = DigestFormatter.format(polished_digest)
         return PolishResult(
             success=True,
@@ -103,22 +168,158 @@ class WorklogService:
             polished_count=polished_digest.entry_count,
         )
 
+    def _polish(
+        self, digest: DailyDigest, merge_similar: bool
+    ) -> tuple[DailyDigest, PolishState]:
+        """计算润色结果和新的润色水位"""
+        contents = digest.get_entry_contents()
+
+        # 基础润色：去重、重新编号。上次润色后的条目没有变化时，只检查之后追加的条目
+        # 保留下来的条目沿用原对象，不丢失创建时间
+        state = self.polish_state.load(digest.date) if self.polish_state else None
+        if (
+            state is not None
+            and (state.merged or not merge_similar)
+            and _state_matches(state, contents)
+        ):
+            polished = digest.entries[: state.entry_count]
+            seen = state.content_hashes
+            pending = digest.entries[state.entry_count :]
+        else:
+            polished, seen, pending = [], set(), digest.entries
+        settled = len(polished)
+        for entry in pending:
+            normalized = entry.content.strip()
+            key = _content_hash(normalized)
+            if key not in seen:
+                seen.add(key)
+                if normalized != entry.content:
+                    entry = WorkLogEntry(content=normalized, created_at=entry.created_at)
+                polished.append(entry)
+
+        if merge_similar:
+            # 不经过 LLM，按字符 n-gram 余弦相似度分组合并；水位之前的条目上次已合并，
+            # 只需把新条目并入已有的组
+            polished = self._merge_entries(polished, settled)
+            seen = {_content_hash(entry.content) for entry in polished}
+
+        polished_digest = DailyDigest(date=digest.date, entries=polished)
+        return polished_digest, PolishState(
+            entry_count=len(polished),
+            prefix_hash=_prefix_hash(polished_digest.get_entry_contents()),
+            content_hashes=seen,
+            merged=merge_similar,
+        )
+
+    def _merge_entries(self, entries: list[WorkLogEntry], settled: int = 0) -> list[WorkLogEntry]:
+        """合并相似条目，合并后的条目沿用组内最早的创建时间
+
+        前 settled 条已经合并过，彼此不再比较。
+        """
+        merged: list[WorkLogEntry] = []
+        for group in self.entry_merger.groups([e.content for e in entries], settled):
+            members = [entries[i] for i in group]
+            if len(members) == 1:
+                merged.append(members[0])
+                continue
+            merged.append(
+                WorkLogEntry(
+                    content=self.entry_merger.merge_group([m.content for m in members]),
+                    created_at=min(m.created_at for m in members),
+                )
+            )
+        return merged
+
     def collect_sessions(self, target_date: date | None = None) -> SessionCollectResult:
         """采集指定日期的 AI 会话"""
         target = target_date or date.today()
-        all_sessions = []
+        results = self._run_collectors(lambda c: c.collect(target))
+        return self._build_collect_result(target, results)
 
-        for collector in self.session_collectors:
-            sessions = collector.collect(target)
-            all_sessions.extend(sessions)
+    async def acollect_sessions(self, target_date: date | None = None) -> SessionCollectResult:
+        """异步采集指定日期的 AI 会话，各采集器并发执行且不阻塞事件循环"""
+        target = target_date or date.today()
+        results = await self._gather_collectors(lambda c: c.collect(target))
+        return self._build_collect_result(target, results)
+
+    def collect_sessions_range(self, start_date: date, end_date: date) -> SessionRangeResult:
+        """采集日期范围内的 AI 会话，每个采集器只扫描一遍数据"""
+        results = self._run_collectors(lambda c: c.collect_range(start_date, end_date))
+        return self._build_range_result(start_date, end_date, results)
+
+    async def acollect_sessions_range(
+        self, start_date: date, end_date: date
+    ) -> SessionRangeResult:
+        """异步采集日期范围内的 AI 会话"""
+        results = await self._gather_collectors(lambda c: c.collect_range(start_date, end_date))
+        return self._build_range_result(start_date, end_date, results)
 
-        # 按时间排序
-        all_sessions.sort(key=lambda s: s.start_time)
+    async def astream_sessions(self, target_date: date | None = None) -> Iterator[AISession]:
+        """异步采集指定日期的 AI 会话，返回按时间归并的会话流
 
+        不构建完整的会话列表，调用方逐个消费（如直接交给分页快照去重）。
+        """
+        target = target_date or date.today()
+        streams = await self._gather_collectors(lambda c: c.collect(target))
+        return merge_sessions(streams)
+
+    async def astream_sessions_range(
+        self, start_date: date, end_date: date
+    ) -> Iterator[tuple[date, AISession]]:
+        """异步采集日期范围内的 AI 会话，按日期升序逐个产出 (日期, 会话)"""
+        results = await self._gather_collectors(lambda c: c.collect_range(start_date, end_date))
+        by_date = _group_by_date(results)
+        return (
+            (day, session) for day in sorted(by_date) for session in merge_sessions(by_date[day])
+        )
+
+    def _run_collectors(self, call: Callable[[Any], Any]) -> list[Any]:
+        """同步执行各采集器，max_workers 大于 1 时使用线程池；异步采集器在独立事件循环中运行"""
+
+        def run(collector: Any) -> Any:
+            result = call(collector)
+            return asyncio.run(result) if is_async_collector(collector) else result
+
+        if self.max_workers > 1 and len(self.session_collectors) > 1:
+            workers = min(self.max_workers, len(self.session_collectors))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(run, self.session_collectors))
+        return [run(collector) for collector in self.session_collectors]
+
+    async def _gather_collectors(self, call: Callable[[Any], Awaitable[Any]]) -> list[Any]:
+        """并发执行各采集器，最多 max_concurrency 个同时运行，结果按采集器顺序返回"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(collector: AsyncSessionCollectorPort) -> Any:
+            async with semaphore:
+                return await call(collector)
+
+        return list(await asyncio.gather(*(run(c) for c in self._async_collectors)))
+
+    def _build_collect_result(
+        self, target: date, streams: list[list[AISession]]
+    ) -> SessionCollectResult:
+        # 各采集器的结果已按时间排序，归并即可
+        sessions = list(merge_sessions(streams))
         return SessionCollectResult(
             date=target.strftime("%Y-%m-%d"),
-            sessions=all_sessions,
-            total_count=len(all_sessions),
+            sessions=sessions,
+            total_count=len(sessions),
+        )
+
+    def _build_range_result(
+        self,
+        start_date: date,
+        end_date: date,
+        results: list[dict[date, list[AISession]]],
+    ) -> SessionRangeResult:
+        by_date = _group_by_date(results)
+        days = [self._build_collect_result(day, by_date[day]) for day in sorted(by_date)]
+        return SessionRangeResult(
+            start_date=start_date.strftime("%Y-%m-%d"),
+            end_date=end_date.strftime("%Y-%m-%d"),
+            days=days,
+            total_count=sum(d.total_count for d in days),
         )
 
     def rewrite_digest(
@@ -136,10 +337,26 @@ class WorklogService:
                 message="日报条目不能为空",
             )
 
-        # 创建新的日报
-        new_entries = [WorkLogEntry(content=e.strip()) for e in entries if e.strip()]
-        new_digest = DailyDigest(date=target, entries=new_entries)
-        self.storage.save(new_digest)
+        new_digest = DailyDigest.empty(target)
+
+        def rewrite(existing: DailyDigest | None) -> DailyDigest:
+            # 创建新的日报，内容与原条目相同的沿用原来的创建时间
+            created: dict[str, list[datetime]] = {}
+            for entry in existing.entries if existing else []:
+                created.setdefault(entry.content.strip(), []).append(entry.created_at)
+            for text in (e.strip() for e in entries):
+                if not text:
+                    continue
+                times = created.get(text)
+                if times:
+                    new_digest.append(WorkLogEntry(content=text, created_at=times.pop(0)))
+                else:
+                    new_digest.append(WorkLogEntry(content=text))
+            return new_digest
+
+        # 读取原条目到保存之间持有日期锁，其他进程在此期间的追加不会被覆盖
+        self.storage.update(target, rewrite)
+        self._reindex(target)
 
         content = DigestFormatter.format(new_digest)
         return RewriteResult(
@@ -149,3 +366,75 @@ class WorklogService:
             entry_count=new_digest.entry_count,
             message="日报已重写",
         )
+
+    def search_worklog(self, query: str, limit: int = 20) -> SearchResult:
+        """在历史日报中检索条目"""
+        if self.search_index is None or not query.strip():
+            return SearchResult(query=query, hits=[], total_count=0)
+        hits = self.search_index.search(query, limit)
+        return SearchResult(query=query, hits=hits, total_count=len(hits))
+
+    def sync_search_index(self) -> int:
+        """为尚未建立索引的日期补建索引，返回补建的天数"""
+        if self.search_index is None:
+            return 0
+        indexed = self.search_index.indexed_dates()
+        missing = [day for day in self.storage.list_dates() if day not in indexed]
+        if not missing:
+            return 0
+        digests = self.storage.load_range(missing[0], missing[-1])
+        for day in missing:
+            self.search_index.update(digests.get(day) or DailyDigest.empty(day))
+        return len(missing)
+
+    def _index_entry(self, target: date, position: int, content: str) -> None:
+        """追加后只把新条目写入索引，不重建这一天
+
+        内容含有换行、解析出的条目与原文不同，或该日期还没有索引时，退回整天重建。
+        """
+        if self.search_index is None:
+            return
+        line = DigestFormatter.format_entry(position, content)
+        if DigestFormatter.parse(line, target).get_entry_contents() != [content] or (
+            not self.search_index.add_entry(target, position, content)
+        ):
+            self._reindex(target)
+
+    def _reindex(self, target: date) -> None:
+        """日报变化后只重建这一天的索引"""
+        if self.search_index is None:
+            return
+        digest = self.storage.load(target)
+        self.search_index.update(digest or DailyDigest.empty(target))
+
+
+def _group_by_date(
+    results: list[dict[date, list[AISession]]],
+) -> dict[date, list[list[AISession]]]:
+    """把各采集器按天分组的结果整理为 日期 -> 各采集器的会话列表"""
+    by_date: dict[date, list[list[AISession]]] = {}
+    for collected in results:
+        for day, sessions in collected.items():
+            by_date.setdefault(day, []).append(sessions)
+    return by_date
+
+
+def _content_hash(content: str) -> str:
+    """条目内容的哈希，用于润色去重"""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _prefix_hash(contents: list[str]) -> str:
+    """一组条目内容整体的哈希，用于确认已润色的条目没有被改动"""
+    h = hashlib.blake2b(digest_size=16)
+    for content in contents:
+        h.update(content.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _state_matches(state: PolishState, contents: list[str]) -> bool:
+    """润色水位之前的条目是否与上次润色结果一致"""
+    return state.entry_count <= len(contents) and state.prefix_hash == _prefix_hash(
+        contents[: state.entry_count]
+    )
@@ -1,14 +1,64 @@
 """出站端口 - 会话采集"""
 
+import asyncio
+import heapq
+import inspect
+from collections.abc import Iterable, Iterator
 from datetime import date
 from typing import Protocol
 
-from mcp_worklog.domain.session import AISession
+from mcp_worklog.domain.session import AISession, session_order
 
 
 class SessionCollectorPort(Protocol):
-    """会话采集端口"""
+    """会话采集端口
+
+    每天的会话按 session_order 升序返回，多个采集器的结果直接归并，无需整体排序。
+    """
 
     def collect(self, target_date: date) -> list[AISession]:
         """采集指定日期的会话"""
         ...
+
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        """采集日期范围内（含首尾）的会话，按天分组，没有会话的日期不出现在结果中"""
+        ...
+
+
+class AsyncSessionCollectorPort(Protocol):
+    """异步会话采集端口，采集过程不阻塞事件循环"""
+
+    async def collect(self, target_date: date) -> list[AISession]:
+        """采集指定日期的会话"""
+        ...
+
+    async def collect_range(
+        self, start_date: date, end_date: date
+    ) -> dict[date, list[AISession]]:
+        """采集日期范围内（含首尾）的会话，按天分组"""
+        ...
+
+
+class AsyncCollectorAdapter:
+    """把同步采集器适配为异步端口，阻塞的文件和 sqlite 操作放到线程中执行"""
+
+    def __init__(self, collector: SessionCollectorPort) -> None:
+        self.collector = collector
+
+    async def collect(self, target_date: date) -> list[AISession]:
+        return await asyncio.to_thread(self.collector.collect, target_date)
+
+    async def collect_range(
+        self, start_date: date, end_date: date
+    ) -> dict[date, list[AISession]]:
+        return await asyncio.to_thread(self.collector.collect_range, start_date, end_date)
+
+
+def merge_sessions(streams: Iterable[Iterable[AISession]]) -> Iterator[AISession]:
+    """k 路归并多个已按 session_order 排好序的会话流，逐个产出"""
+    return heapq.merge(*streams, key=session_order)
+
+
+def is_async_collector(collector: object) -> bool:
+    """判断采集器是否实现了异步端口"""
+    return inspect.iscoroutinefunction(getattr(collector, "collect", None))
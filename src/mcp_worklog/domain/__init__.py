@@ -1,7 +1,17 @@
 """领域层 - 核心业务逻辑，不依赖任何外部框架"""
 
 from .formatter import DigestFormatter
+from .merging import EntryMerger
 from .models import DailyDigest, WorkLogEntry
 from .session import AISession, SessionSource
+from .similarity import NearDuplicateFilter
 
-__all__ = ["WorkLogEntry", "DailyDigest", "DigestFormatter", "AISession", "SessionSource"]
+__all__ = [
+    "WorkLogEntry",
+    "DailyDigest",
+    "DigestFormatter",
+    "AISession",
+    "SessionSource",
+    "NearDuplicateFilter",
+    "EntryMerger",
+]
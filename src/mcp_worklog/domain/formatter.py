@@ -1,7 +1,8 @@
 """领域服务 - 日报格式化与解析"""
 
 import re
-from datetime import date, datetime
+from collections.abc import Mapping
+from datetime import date
 
 from .models import DailyDigest, WorkLogEntry
 
@@ -18,33 +19,42 @@ class DigestFormatter:
         lines = [digest.date.strftime(DigestFormatter.DATE_FORMAT), ""]
 
         for i, entry in enumerate(digest.entries, start=1):
-            lines.append(f"{i}. {entry.content}")
+            lines.append(DigestFormatter.format_entry(i, entry.content))
 
         return "\n".join(lines)
 
     @staticmethod
-    def parse(text: str, target_date: date) -> DailyDigest:
-        """从文本解析日报"""
-        entries: list[WorkLogEntry] = []
-        lines = text.split("\n")
-
-        for line in lines:
-            line = line.lstrip()  # 只去掉行首空格，保留行尾
-            if not line.strip():
-                continue
-
-            # 跳过日期行
-            try:
-                datetime.strptime(line.strip(), DigestFormatter.DATE_FORMAT)
-                continue
-            except ValueError:
-                pass
-
-            # 解析编号条目
-            match = DigestFormatter.ENTRY_PATTERN.match(line)
-            if match:
-                content = match.group(2)  # group(2) 是内容部分
-                if content.strip():  # 只检查是否有实际内容
-                    entries.append(WorkLogEntry(content=content))
+    def format_entry(number: int, content: str) -> str:
+        """格式化单个编号条目"""
+        return f"{number}. {content}"
+
+    @staticmethod
+    def count_entries(text: str) -> int:
+        """统计 parse 会解析出的条目数，不构建条目对象"""
+        return sum(1 for content in _ENTRY_SCANNER.findall(text) if content.strip())
 
+    @staticmethod
+    def parse(text: str, target_date: date) -> DailyDigest:
+        """从文本解析日报
+
+        整段文本只扫描一次：编号条目行（允许行首空白）直接由正则匹配，
+        日期行、空行和其他行不会匹配，无需逐行尝试解析日期。
+        """
+        entries = [
+            WorkLogEntry(content=content)
+            for content in _ENTRY_SCANNER.findall(text)
+            if content.strip()  # 只检查是否有实际内容，保留行尾空格
+        ]
         return DailyDigest(date=target_date, entries=entries)
+
+    @staticmethod
+    def parse_many(texts: Mapping[date, str]) -> dict[date, DailyDigest]:
+        """批量解析多天的日报文本"""
+        return {
+            target_date: DigestFormatter.parse(text, target_date)
+            for target_date, text in texts.items()
+        }
+
+
+# 多行模式下逐行匹配 "N. 内容"；[^\S\n] 与 str.lstrip 去掉的空白一致但不跨行
+_ENTRY_SCANNER = re.compile(r"^[^\S\n]*\d+\. (.*)$", re.MULTILINE)
@@ -0,0 +1,141 @@
+"""相似条目合并 - 字符 n-gram 向量 + 余弦相似度
+
+同一天里重复记录同一件事的条目（"修复登录超时" 与 "修复登录接口超时问题，补充单测"）
+措辞不同但共享大量字符片段。条目规范化后切成字符 n-gram 计数向量（中文按字切分，
+无需分词），两两计算余弦相似度；按原顺序贪心分组，每组合并为一条。安装了 NumPy
+时按批做矩阵乘法，否则使用纯 Python 实现，两者只有浮点误差。
+"""
+
+import math
+import re
+from collections import Counter
+from collections.abc import Sequence
+
+from .tokenizer import _CJK_CLASS
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖
+    np = None
+
+_WHITESPACE = re.compile(r"\s+")
+_UNIT_PATTERN = re.compile(_CJK_CLASS + r"|[0-9a-z_]+")
+_CLAUSE_SPLIT = re.compile(r"[，,；;。]\s*")
+_JOINER = "；"
+
+
+def ngram_vector(text: str, size: int = 2) -> Counter[str]:
+    """把文本规范化（小写、去掉空白）后切成字符 n-gram 计数向量"""
+    normalized = _WHITESPACE.sub("", text.lower())
+    if len(normalized) <= size:
+        return Counter([normalized]) if normalized else Counter()
+    return Counter(normalized[i : i + size] for i in range(len(normalized) - size + 1))
+
+
+def cosine(a: Counter[str], b: Counter[str]) -> float:
+    """两个计数向量的余弦相似度"""
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    return dot / (_norm(a) * _norm(b))
+
+
+def _norm(vector: Counter[str]) -> float:
+    return math.sqrt(sum(count * count for count in vector.values()))
+
+
+class EntryMerger:
+    """相似条目合并器
+
+    余弦相似度不低于 threshold 的条目归入同一组：按原顺序，每条加入第一个与组首
+    条目足够相似的组，否则自成一组。组首决定合并后条目的位置。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        ngram_size: int = 2,
+        use_numpy: bool | None = None,
+        batch_size: int = 256,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold 必须在 (0, 1] 之间")
+        self.threshold = threshold
+        self.ngram_size = ngram_size
+        self.batch_size = batch_size
+        self.use_numpy = np is not None and (use_numpy is None or use_numpy)
+
+    def merge(self, contents: Sequence[str]) -> list[str]:
+        """合并相似条目，返回合并后的条目（保持组首的原顺序）"""
+        return [self.merge_group([contents[i] for i in group]) for group in self.groups(contents)]
+
+    def groups(self, contents: Sequence[str], settled: int = 0) -> list[list[int]]:
+        """按原顺序贪心分组，返回每组条目的下标
+
+        前 settled 条是已经合并过的结果，各自成组且彼此不再比较，只计算之后的条目
+        与全部条目的相似度，增量合并的开销与新条目数成正比。
+        """
+        similar = self.similarity(contents, start=settled)
+        groups: list[list[int]] = [[i] for i in range(settled)]
+        for i in range(settled, len(contents)):
+            row = similar[i - settled]
+            for group in groups:
+                if row[group[0]] >= self.threshold:
+                    group.append(i)
+                    break
+            else:
+                groups.append([i])
+        return groups
+
+    def similarity(self, contents: Sequence[str], start: int = 0) -> list[list[float]]:
+        """从第 start 条起每条与全部条目的余弦相似度"""
+        vectors = [ngram_vector(text, self.ngram_size) for text in contents]
+        if self.use_numpy and vectors[start:]:
+            return self._similarity_numpy(vectors, start)
+        return [[cosine(a, b) for b in vectors] for a in vectors[start:]]
+
+    def _similarity_numpy(self, vectors: list[Counter[str]], start: int) -> list[list[float]]:
+        """向量归一化后按行分批与整个矩阵相乘"""
+        vocabulary: dict[str, int] = {}
+        for vector in vectors:
+            for gram in vector:
+                vocabulary.setdefault(gram, len(vocabulary))
+        matrix = np.zeros((len(vectors), max(len(vocabulary), 1)), dtype=np.float64)
+        for row, vector in enumerate(vectors):
+            for gram, count in vector.items():
+                matrix[row, vocabulary[gram]] = count
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        result: list[list[float]] = []
+        for begin in range(start, len(vectors), self.batch_size):
+            result.extend((matrix[begin : begin + self.batch_size] @ matrix.T).tolist())
+        return result
+
+    def merge_group(self, members: Sequence[str]) -> str:
+        """以最长的条目为主体，补上其他条目中主体没有包含的分句
+
+        分句只有在内容单元（中文单字、英文单词和数字）全部已出现时才丢弃；相似但
+        带有不同人名、编号、版本号的分句一律保留，合并不会丢失信息。
+        """
+        if len(members) == 1:
+            return members[0]
+        base = max(members, key=len)
+        covered = _units(base)
+        extra: list[str] = []
+        for member in members:
+            if member is base:
+                continue
+            for clause in _CLAUSE_SPLIT.split(member):
+                units = _units(clause)
+                if not units or units <= covered:
+                    continue
+                extra.append(clause.strip())
+                covered |= units
+        return _JOINER.join([base.rstrip("，,；;。"), *extra]) if extra else base
+
+
+def _units(text: str) -> set[str]:
+    """文本的内容单元：中日韩单字、小写的英文单词和数字"""
+    return set(_UNIT_PATTERN.findall(text.lower()))
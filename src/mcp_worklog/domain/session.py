@@ -4,6 +4,9 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
+# 采集时单条用户消息保留的最大字符数，分页时再按 token 预算截断
+MAX_MESSAGE_CHARS = 2000
+
 
 class SessionSource(Enum):
     """会话来源"""
@@ -36,3 +39,31 @@ class AISession:
         if not self.messages:
             return ""
         return "\n".join(f"- {msg}" for msg in self.messages[:20])  # 限制前20条
+
+    def to_dict(self) -> dict:
+        """转换为可 JSON 序列化的字典"""
+        return {
+            "source": self.source.value,
+            "session_id": self.session_id,
+            "start_time": self.start_time.isoformat(),
+            "title": self.title,
+            "message_count": self.message_count,
+            "messages": self.messages,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AISession":
+        """从字典还原会话"""
+        return cls(
+            source=SessionSource(data["source"]),
+            session_id=data["session_id"],
+            start_time=datetime.fromisoformat(data["start_time"]),
+            title=data.get("title"),
+            message_count=data.get("message_count", 0),
+            messages=data.get("messages"),
+        )
+
+
+def session_order(session: AISession) -> tuple[datetime, str, str]:
+    """会话的排序键：按时间排序，时间相同时按来源和 ID 排序保证结果确定"""
+    return session.start_time, session.source.value, session.session_id
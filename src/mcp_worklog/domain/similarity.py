@@ -0,0 +1,122 @@
+"""近似重复检测 - MinHash 签名 + LSH 分桶
+
+重试、轻微改写、重复粘贴的提示词与原消息只有少量字符差异，精确去重无法识别。
+消息规范化后切成字符 n-gram（对中文同样适用），用 MinHash 签名近似 Jaccard
+相似度，再按 LSH 分带只比较落入同一桶的候选对。安装了 NumPy 时分批向量化
+计算签名，否则使用纯 Python 实现，两者结果一致。
+"""
+
+import random
+import re
+import zlib
+from collections.abc import Callable, Iterable, Sequence
+from itertools import chain
+from typing import TypeVar
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖
+    np = None
+
+T = TypeVar("T")
+
+# 哈希函数 (a * x + b) mod p，a < p 且 x < 2^32 时乘积不会溢出 uint64
+_PRIME = (1 << 31) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+def shingles(text: str, size: int = 3) -> set[int]:
+    """把文本规范化（小写、合并空白）后切成字符 n-gram 并哈希"""
+    normalized = _WHITESPACE.sub(" ", text.strip().lower())
+    if len(normalized) <= size:
+        grams = [normalized]
+    else:
+        grams = [normalized[i : i + size] for i in range(len(normalized) - size + 1)]
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+def jaccard(a: set[int], b: set[int]) -> float:
+    """两个 n-gram 集合的 Jaccard 相似度"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateFilter:
+    """近似重复消息过滤器
+
+    字符 n-gram 的 Jaccard 相似度不低于 threshold 的消息只保留首次出现的一条。
+    num_perm 个哈希分为 bands 个带，任意一带签名完全相同即成为候选，候选再按
+    精确 Jaccard 复核，LSH 只负责减少比较次数。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        use_numpy: bool | None = None,
+        batch_size: int = 256,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold 必须在 (0, 1] 之间")
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.batch_size = batch_size
+        self.use_numpy = np is not None and (use_numpy is None or use_numpy)
+        # 固定种子，保证同一组消息每次得到相同签名
+        rng = random.Random(1)
+        self._a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+
+    def filter(self, messages: Iterable[T], key: Callable[[T], str] | None = None) -> list[T]:
+        """按原顺序过滤近似重复项，key 指定参与比较的文本（默认为消息本身）"""
+        items = list(messages)
+        if len(items) < 2:
+            return items
+        texts = [key(item) if key else item for item in items]
+        shingle_sets = [shingles(text, self.shingle_size) for text in texts]
+        signatures = self.signatures(shingle_sets)
+
+        buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+        kept: list[int] = []
+        for i, signature in enumerate(signatures):
+            band_keys = [
+                (band, tuple(signature[band * self.rows : (band + 1) * self.rows]))
+                for band in range(self.bands)
+            ]
+            candidates = {j for band_key in band_keys for j in buckets.get(band_key, ())}
+            if any(jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold for j in candidates):
+                continue
+            kept.append(i)
+            for band_key in band_keys:
+                buckets.setdefault(band_key, []).append(i)
+        return [items[i] for i in kept]
+
+    def signatures(self, shingle_sets: Sequence[set[int]]) -> list[list[int]]:
+        """计算每个 n-gram 集合的 MinHash 签名"""
+        if self.use_numpy:
+            signatures: list[list[int]] = []
+            for start in range(0, len(shingle_sets), self.batch_size):
+                signatures.extend(self._signatures_numpy(shingle_sets[start : start + self.batch_size]))
+            return signatures
+        return [
+            [min((a * x + b) % _PRIME for x in hashes) for a, b in zip(self._a, self._b)]
+            for hashes in shingle_sets
+        ]
+
+    def _signatures_numpy(self, shingle_sets: Sequence[set[int]]) -> list[list[int]]:
+        """一批集合拼接为一个数组，一次矩阵运算得到所有哈希值后按段取最小值"""
+        lengths = [len(hashes) for hashes in shingle_sets]
+        values = np.fromiter(chain.from_iterable(shingle_sets), dtype=np.uint64, count=sum(lengths))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.intp)
+        a = np.array(self._a, dtype=np.uint64)[:, None]
+        b = np.array(self._b, dtype=np.uint64)[:, None]
+        hashed = (a * values[None, :] + b) % np.uint64(_PRIME)
+        return np.minimum.reduceat(hashed, offsets, axis=1).T.tolist()
@@ -0,0 +1,25 @@
+"""文本分词 - 面向中英文混排的工作记录
+
+中文没有空格分隔，按连续的中日韩字符切成二元组（单字时保留单字）；
+英文和数字按词切分并转为小写。
+"""
+
+import re
+
+_CJK_CLASS = r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]"
+_TOKEN_PATTERN = re.compile(_CJK_CLASS + r"+|[0-9a-z_]+")
+_CJK_PATTERN = re.compile(_CJK_CLASS)
+
+
+def tokenize(text: str) -> list[str]:
+    """把文本切分为检索词项，保持出现顺序（可能重复）"""
+    tokens: list[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
@@ -6,29 +6,112 @@ from pathlib import Path
 
 from mcp.server.stdio import stdio_server
 
+from mcp_worklog.adapters.inbound.dispatch import ToolDispatcher
 from mcp_worklog.adapters.inbound.mcp_server import create_mcp_server
+from mcp_worklog.adapters.outbound.polish_state import FilePolishStateStore
+from mcp_worklog.adapters.outbound.search_index import SqliteSearchIndex
 from mcp_worklog.adapters.outbound.session_collectors import (
+    CachedSessionCollector,
     ClaudeCodeCollector,
     CursorCollector,
     KiroCollector,
+    WatchingSessionCollector,
+    create_watcher,
 )
-from mcp_worklog.adapters.outbound.storage import LocalFileStorage
-from mcp_worklog.application import WorklogService
+from mcp_worklog.adapters.outbound.session_collectors.manifest import FileManifest
+from mcp_worklog.adapters.outbound.session_collectors.parallel import ParallelOptions
+from mcp_worklog.adapters.outbound.storage import LocalFileStorage, SqliteStorage
+from mcp_worklog.application import SessionPaginator, WorklogService
+from mcp_worklog.application.pagination import ESTIMATORS
+from mcp_worklog.domain import EntryMerger, NearDuplicateFilter
 
 
-async def run_server(storage_path: Path) -> None:
+async def run_server(
+    storage_path: Path,
+    cache_path: Path,
+    parallel: ParallelOptions | None = None,
+    session_cache_size: int = 32,
+    near_dup_threshold: float = 0.8,
+    page_budget: int | None = 4000,
+    estimator: str = "tokens",
+    watch: bool = False,
+    group_commit: bool = False,
+    backend: str = "file",
+    import_files: bool = False,
+    digest_cache_size: int = 32,
+    archive_months: bool = False,
+    merge_threshold: float = 0.6,
+    tool_workers: int = 4,
+    tool_limits: dict[str, int] | None = None,
+) -> None:
     """运行 MCP Server"""
-    storage = LocalFileStorage(storage_path)
-    session_collectors = [ClaudeCodeCollector(), KiroCollector(), CursorCollector()]
-    service = WorklogService(storage, session_collectors)
-    server = create_mcp_server(service)
-
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options(),
+    parallel = parallel or ParallelOptions()
+    file_storage = LocalFileStorage(
+        storage_path, group_commit=group_commit, cache_size=digest_cache_size
+    )
+    if archive_months:
+        file_storage.archive_months()
+    storage: LocalFileStorage | SqliteStorage = file_storage
+    if backend == "sqlite":
+        storage = SqliteStorage(storage_path / SqliteStorage.DB_FILE)
+        if import_files:
+            storage.import_files(file_storage)
+    manifest = FileManifest(cache_path / "manifest")
+    collectors = {
+        "claude_code": ClaudeCodeCollector(cache_dir=cache_path, manifest=manifest, parallel=parallel),
+        "kiro": KiroCollector(manifest=manifest, parallel=parallel),
+        "cursor": CursorCollector(manifest=manifest, parallel=parallel),
+    }
+    session_collectors = [
+        CachedSessionCollector(
+            collector,
+            cache_path=cache_path / f"sessions_{name}.json",
+            max_entries=session_cache_size,
         )
+        for name, collector in collectors.items()
+    ]
+    watchers: list[WatchingSessionCollector] = []
+    if watch:
+        # 监听模式：后台随源文件变化刷新当天会话，查询当天直接读内存
+        for i, collector in enumerate(collectors.values()):
+            watching = WatchingSessionCollector(
+                session_collectors[i], create_watcher([collector.base_path])
+            )
+            watching.start()
+            watchers.append(watching)
+        session_collectors = watchers
+    # 索引与日报放在同一目录，共用存储目录的多个进程维护同一份索引
+    search_index = SqliteSearchIndex(storage_path / SqliteSearchIndex.DB_FILE)
+    service = WorklogService(
+        storage,
+        session_collectors,
+        max_workers=parallel.max_workers,
+        search_index=search_index,
+        entry_merger=EntryMerger(merge_threshold),
+        polish_state=FilePolishStateStore(storage_path),
+    )
+    # 首次启动或切换存储后端时补建缺失日期的索引
+    service.sync_search_index()
+    near_duplicates = NearDuplicateFilter(near_dup_threshold) if near_dup_threshold > 0 else None
+    paginator = SessionPaginator(
+        near_duplicates=near_duplicates,
+        page_budget=page_budget,
+        estimator=ESTIMATORS[estimator],
+    )
+    dispatcher = ToolDispatcher(max_workers=tool_workers, tool_limits=tool_limits)
+    server = create_mcp_server(service, paginator, dispatcher)
+
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options(),
+            )
+    finally:
+        dispatcher.close()
+        for watching in watchers:
+            watching.close()
 
 
 def main() -> None:
@@ -40,10 +123,134 @@ def main() -> None:
         required=True,
         help="日报存储目录路径",
     )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default="~/.cache/mcp-worklog",
+        help="会话采集缓存目录路径",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="会话采集并行线程数，1 为串行",
+    )
+    parser.add_argument(
+        "--process-pool",
+        action="store_true",
+        help="使用进程池解码会话 JSON（CPU 密集）",
+    )
+    parser.add_argument(
+        "--session-cache-size",
+        type=int,
+        default=32,
+        help="按日期缓存的会话采集结果数量上限",
+    )
+    parser.add_argument(
+        "--near-dup-threshold",
+        type=float,
+        default=0.8,
+        help="会话消息近似重复的相似度阈值（0~1），0 表示只做精确去重",
+    )
+    parser.add_argument(
+        "--page-budget",
+        type=int,
+        default=4000,
+        help="collect_sessions 每页的长度预算，0 表示按固定 50 条分页（单条消息最多 200 字符）",
+    )
+    parser.add_argument(
+        "--token-estimator",
+        choices=sorted(ESTIMATORS),
+        default="tokens",
+        help="分页预算的计量方式：tokens 为离线估算的 token 数，chars 为字符数",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="常驻监听会话目录，变化时刷新当天会话的内存索引",
+    )
+    parser.add_argument(
+        "--group-commit",
+        action="store_true",
+        help="合并并发的追加请求，一次写入和 fsync",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["file", "sqlite"],
+        default="file",
+        help="日报存储后端：file 为每天一个文本文件，sqlite 为存储目录下的 worklog.db",
+    )
+    parser.add_argument(
+        "--import-files",
+        action="store_true",
+        help="使用 sqlite 后端时，先导入存储目录中已有的 YYYY-MM-DD.txt 日报",
+    )
+    parser.add_argument(
+        "--digest-cache-size",
+        type=int,
+        default=32,
+        help="内存中缓存的已解析日报天数，0 表示不缓存",
+    )
+    parser.add_argument(
+        "--archive-months",
+        action="store_true",
+        help="启动时把本月之前的日报文件按月打包到 archive/ 目录",
+    )
+    parser.add_argument(
+        "--merge-threshold",
+        type=float,
+        default=0.6,
+        help="polish_digest 本地合并相似条目的余弦相似度阈值（0~1]",
+    )
+    parser.add_argument(
+        "--tool-workers",
+        type=int,
+        default=4,
+        help="执行工具调用的线程数",
+    )
+    parser.add_argument(
+        "--tool-limit",
+        action="append",
+        default=[],
+        metavar="TOOL=N",
+        help="单个工具同时执行的调用数上限，可重复指定，如 collect_sessions=1",
+    )
     args = parser.parse_args()
 
     storage_path = Path(args.storage_path).expanduser()
-    asyncio.run(run_server(storage_path))
+    cache_path = Path(args.cache_path).expanduser()
+    parallel = ParallelOptions(max_workers=max(1, args.workers), use_processes=args.process_pool)
+    asyncio.run(
+        run_server(
+            storage_path,
+            cache_path,
+            parallel,
+            args.session_cache_size,
+            min(args.near_dup_threshold, 1.0),
+            args.page_budget if args.page_budget > 0 else None,
+            args.token_estimator,
+            args.watch,
+            args.group_commit,
+            args.backend,
+            args.import_files,
+            args.digest_cache_size,
+            args.archive_months,
+            args.merge_threshold,
+            max(1, args.tool_workers),
+            _parse_tool_limits(parser, args.tool_limit),
+        )
+    )
+
+
+def _parse_tool_limits(parser: argparse.ArgumentParser, values: list[str]) -> dict[str, int]:
+    """解析 --tool-limit TOOL=N 参数"""
+    limits: dict[str, int] = {}
+    for value in values:
+        tool, _, limit = value.partition("=")
+        if not tool or not limit.isdigit() or int(limit) < 1:
+            parser.error(f"--tool-limit 格式应为 TOOL=N（N >= 1）: {value}")
+        limits[tool] = int(limit)
+    return limits
 
 
 if __name__ == "__main__":
@@ -0,0 +1,477 @@
+"""会话采集适配器单元测试"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp_worklog.adapters.outbound.session_collectors import (
+    CachedSessionCollector,
+    ClaudeCodeCollector,
+    CursorCollector,
+    KiroCollector,
+    WatchingSessionCollector,
+    claude_code,
+    create_watcher,
+)
+from mcp_worklog.adapters.outbound.session_collectors.manifest import FileManifest
+from mcp_worklog.adapters.outbound.session_collectors.parallel import ParallelOptions
+from mcp_worklog.adapters.outbound.session_collectors.watcher import PollingWatcher
+
+
+def _claude_line(ts: str, content: str, msg_type: str = "human") -> str:
+    return json.dumps(
+        {"type": msg_type, "timestamp": ts, "message": {"content": content}},
+        ensure_ascii=False,
+    ) + "\n"
+
+
+class TestClaudeCodeCollector:
+    """ClaudeCodeCollector 单元测试"""
+
+    @pytest.fixture
+    def session_file(self, tmp_path: Path) -> Path:
+        project_dir = tmp_path / "projects" / "demo"
+        project_dir.mkdir(parents=True)
+        return project_dir / "session-1.jsonl"
+
+    def test_collect_target_date_only(self, tmp_path: Path, session_file: Path):
+        """测试只采集目标日期的消息"""
+        session_file.write_text(
+            _claude_line("2024-12-10T09:00:00Z", "昨天的任务")
+            + _claude_line("2024-12-11T09:00:00Z", "修复登录问题")
+            + _claude_line("2024-12-11T09:01:00Z", "好的", msg_type="assistant"),
+            encoding="utf-8",
+        )
+        collector = ClaudeCodeCollector(tmp_path / "projects")
+
+        sessions = collector.collect(date(2024, 12, 11))
+
+        assert len(sessions) == 1
+        assert sessions[0].session_id == "session-1"
+        assert sessions[0].title == "修复登录问题"
+        assert sessions[0].message_count == 2
+        assert sessions[0].messages == ["修复登录问题"]
+
+    def test_incremental_tail(self, tmp_path: Path, session_file: Path):
+        """测试追加内容后只解析新增部分"""
+        session_file.write_text(_claude_line("2024-12-11T09:00:00Z", "任务A"), encoding="utf-8")
+        cache_dir = tmp_path / "cache"
+        collector = ClaudeCodeCollector(tmp_path / "projects", cache_dir=cache_dir)
+        collector.collect(date(2024, 12, 11))
+        first_offset = collector.checkpoints.get(str(session_file)).offset
+
+        with session_file.open("a", encoding="utf-8") as f:
+            f.write(_claude_line("2024-12-11T10:00:00Z", "任务B"))
+            f.write('{"type": "human", "timestamp": "2024-12-11T11:00')  # 未写完的行
+
+        # 新实例从磁盘加载检查点
+        collector = ClaudeCodeCollector(tmp_path / "projects", cache_dir=cache_dir)
+        assert collector.checkpoints.get(str(session_file)).offset == first_offset
+        sessions = collector.collect(date(2024, 12, 11))
+
+        assert sessions[0].messages == ["任务A", "任务B"]
+        checkpoint = collector.checkpoints.get(str(session_file))
+        assert checkpoint.offset < session_file.stat().st_size
+
+    def test_checkpoints_load_on_first_use(self, tmp_path: Path, session_file: Path):
+        """测试检查点分片按需读取，未查询的文件不加载到内存"""
+        session_file.write_text(_claude_line("2024-12-11T09:00:00Z", "任务A"), encoding="utf-8")
+        cache_dir = tmp_path / "cache"
+        ClaudeCodeCollector(tmp_path / "projects", cache_dir=cache_dir).collect(date(2024, 12, 11))
+
+        collector = ClaudeCodeCollector(tmp_path / "projects", cache_dir=cache_dir)
+        assert collector.collect(date.today() + timedelta(days=2)) == []
+        assert collector.checkpoints._checkpoints == {}
+        assert collector.collect(date(2024, 12, 11))[0].messages == ["任务A"]
+        assert list(collector.checkpoints._checkpoints) == [str(session_file)]
+
+    def test_flush_rewrites_changed_shards_only(self, tmp_path: Path, session_file: Path):
+        """测试落盘只重写变化文件的分片，清单不重复保存消息"""
+        other_file = session_file.with_name("session-2.jsonl")
+        session_file.write_text(_claude_line("2024-12-11T09:00:00Z", "任务A"), encoding="utf-8")
+        other_file.write_text(_claude_line("2024-12-11T09:30:00Z", "任务B"), encoding="utf-8")
+        cache_dir = tmp_path / "cache"
+        manifest = FileManifest(cache_dir / "manifest")
+        collector = ClaudeCodeCollector(tmp_path / "projects", cache_dir=cache_dir, manifest=manifest)
+        collector.collect(date(2024, 12, 11))
+
+        shards = cache_dir / ClaudeCodeCollector.CHECKPOINT_DIR
+        before = {p.name: p.stat().st_mtime_ns for p in shards.glob("*.json")}
+        assert len(before) == 2
+        assert "任务" not in "".join(
+            p.read_text(encoding="utf-8") for p in (cache_dir / "manifest").glob("*.json")
+        )
+
+        time.sleep(0.01)
+        with session_file.open("a", encoding="utf-8") as f:
+            f.write(_claude_line("2024-12-11T10:00:00Z", "任务C"))
+        sessions = collector.collect(date(2024, 12, 11))
+
+        after = {p.name: p.stat().st_mtime_ns for p in shards.glob("*.json")}
+        assert sum(after[name] != mtime for name, mtime in before.items()) == 1
+        assert sorted(s.messages for s in sessions) == [["任务A", "任务C"], ["任务B"]]
+
+    def test_concurrent_collects_merge_tail_once(
+        self, tmp_path: Path, session_file: Path, monkeypatch
+    ):
+        """测试并发采集时新增尾部只合并一次"""
+        original_scan = claude_code._scan_tail
+
+        def slow_scan(job):
+            time.sleep(0.05)  # 放大规划与合并之间的窗口
+            return original_scan(job)
+
+        monkeypatch.setattr(claude_code, "_scan_tail", slow_scan)
+        session_file.write_text(_claude_line("2024-12-11T09:00:00Z", "a"), encoding="utf-8")
+        collector = ClaudeCodeCollector(tmp_path / "projects", cache_dir=tmp_path / "cache")
+        collector.collect(date(2024, 12, 11))
+        with session_file.open("a", encoding="utf-8") as f:
+            f.write(_claude_line("2024-12-11T10:00:00Z", "b"))
+
+        barrier = threading.Barrier(4)
+
+        def collect() -> None:
+            barrier.wait()
+            collector.collect(date(2024, 12, 11))
+
+        threads = [threading.Thread(target=collect) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        sessions = collector.collect(date(2024, 12, 11))
+        assert sessions[0].messages == ["a", "b"]
+        assert sessions[0].message_count == 2
+
+    def test_truncated_file_is_reparsed(self, tmp_path: Path, session_file: Path):
+        """测试文件被截断后从头解析"""
+        session_file.write_text(
+            _claude_line("2024-12-11T09:00:00Z", "任务A")
+            + _claude_line("2024-12-11T10:00:00Z", "任务B"),
+            encoding="utf-8",
+        )
+        collector = ClaudeCodeCollector(tmp_path / "projects")
+        collector.collect(date(2024, 12, 11))
+
+        session_file.write_text(_claude_line("2024-12-11T09:00:00Z", "任务C"), encoding="utf-8")
+        sessions = collector.collect(date(2024, 12, 11))
+
+        assert sessions[0].messages == ["任务C"]
+
+    def test_indexed_seek_for_past_date(self, tmp_path: Path, session_file: Path):
+        """测试大文件通过时间索引定位目标日期"""
+        lines = []
+        for day in (10, 11, 12):
+            for minute in range(300):
+                ts = f"2024-12-{day}T{minute // 60:02d}:{minute % 60:02d}:00Z"
+                lines.append(_claude_line(ts, f"{day}日任务{minute}"))
+        session_file.write_text("".join(lines), encoding="utf-8")
+
+        full = ClaudeCodeCollector(tmp_path / "projects").collect(date(2024, 12, 11))
+        collector = ClaudeCodeCollector(tmp_path / "projects", cache_dir=tmp_path / "cache")
+        collector.INDEX_MIN_BYTES = 0
+        sessions = collector.collect(date(2024, 12, 11))
+
+        assert sessions == full
+        assert sessions[0].message_count == 300
+        # 过去日期只做单日扫描，不建立检查点
+        assert collector.checkpoints.get(str(session_file)) is None
+        assert (tmp_path / "cache" / ClaudeCodeCollector.INDEX_DIR).exists()
+
+        # 最后一天扫描到文件末尾，从该日期开始增量跟踪
+        sessions = collector.collect(date(2024, 12, 12))
+        checkpoint = collector.checkpoints.get(str(session_file))
+        assert sessions[0].messages[0] == "12日任务0"
+        assert checkpoint.base_date == "2024-12-12"
+        assert checkpoint.offset == session_file.stat().st_size
+
+    def test_collect_range_buckets_by_day(self, tmp_path: Path, session_file: Path):
+        """测试范围采集一次读取并按天分组"""
+        session_file.write_text(
+            _claude_line("2024-12-10T09:00:00Z", "任务A")
+            + _claude_line("2024-12-11T09:00:00Z", "任务B")
+            + _claude_line("2024-12-13T09:00:00Z", "任务C"),
+            encoding="utf-8",
+        )
+        collector = ClaudeCodeCollector(tmp_path / "projects")
+
+        result = collector.collect_range(date(2024, 12, 11), date(2024, 12, 13))
+
+        assert list(result) == [date(2024, 12, 11), date(2024, 12, 13)]
+        assert result[date(2024, 12, 13)][0].messages == ["任务C"]
+        assert collector.collect(date(2024, 12, 10))[0].messages == ["任务A"]
+
+    def test_parallel_matches_serial(self, tmp_path: Path):
+        """测试并行采集与串行结果一致"""
+        for i in range(6):
+            project_dir = tmp_path / "projects" / f"p{i}"
+            project_dir.mkdir(parents=True)
+            (project_dir / f"s{i}.jsonl").write_text(
+                _claude_line(f"2024-12-11T0{i}:00:00Z", f"任务{i}"), encoding="utf-8"
+            )
+
+        serial = ClaudeCodeCollector(tmp_path / "projects").collect(date(2024, 12, 11))
+        parallel = ClaudeCodeCollector(
+            tmp_path / "projects",
+            parallel=ParallelOptions(max_workers=4, use_processes=True),
+        ).collect(date(2024, 12, 11))
+
+        assert len(serial) == 6
+        assert parallel == serial
+
+
+def _write_kiro_chat(path: Path, start_ms: int, contents: list[str]) -> None:
+    data = {
+        "metadata": {"startTime": start_ms},
+        "chat": [{"role": "human", "content": c} for c in contents],
+    }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+class TestFileManifest:
+    """FileManifest 单元测试"""
+
+    def test_unchanged_file_is_not_reparsed(self, tmp_path: Path, monkeypatch):
+        """测试未变化的文件直接使用清单缓存"""
+        workspace = tmp_path / "kiro" / "ws"
+        workspace.mkdir(parents=True)
+        start_ms = int(datetime(2024, 12, 11, 9, 0).timestamp() * 1000)
+        _write_kiro_chat(workspace / "a.chat", start_ms, ["完成接口联调"])
+
+        manifest_path = tmp_path / "manifest"
+        collector = KiroCollector(tmp_path / "kiro", manifest=FileManifest(manifest_path))
+        assert len(collector.collect(date(2024, 12, 11))) == 1
+
+        collector = KiroCollector(tmp_path / "kiro", manifest=FileManifest(manifest_path))
+        monkeypatch.setattr(collector, "_parse_session", lambda *_: pytest.fail("不应重新解析"))
+        sessions = collector.collect(date(2024, 12, 11))
+
+        assert [s.messages for s in sessions] == [["完成接口联调"]]
+        assert collector.collect(date(2024, 12, 12)) == []
+
+    def test_old_file_skipped_by_mtime(self, tmp_path: Path):
+        """测试修改时间早于目标日期的文件不会被打开"""
+        workspace = tmp_path / "kiro" / "ws"
+        workspace.mkdir(parents=True)
+        chat_file = workspace / "a.chat"
+        start_ms = int(datetime(2024, 12, 11, 9, 0).timestamp() * 1000)
+        _write_kiro_chat(chat_file, start_ms, ["任务"])
+        old = datetime(2024, 12, 11, 10, 0).timestamp()
+        os.utime(chat_file, (old, old))
+
+        manifest = FileManifest()
+        collector = KiroCollector(tmp_path / "kiro", manifest=manifest)
+
+        assert collector.collect(date(2024, 12, 20)) == []
+        assert manifest.lookup(str(chat_file), chat_file.stat().st_mtime_ns, chat_file.stat().st_size) is None
+
+
+class TestKiroCollector:
+    """KiroCollector 单元测试"""
+
+    def test_header_only_for_other_dates(self, tmp_path: Path):
+        """测试日期不匹配时只读取 metadata，匹配时再解析对话"""
+        chat_file = tmp_path / "kiro" / "ws" / "a.chat"
+        chat_file.parent.mkdir(parents=True)
+        start_ms = int(datetime(2024, 12, 11, 9, 0).timestamp() * 1000)
+        data = {
+            "chat": [
+                {"role": "human", "content": "# System Prompt\n忽略"},
+                {"role": "human", "content": "实现导出功能", "metadata": {"x": 1}},
+                {"role": "bot", "content": "好的" * 5000},
+            ],
+            "metadata": {"startTime": start_ms},
+        }
+        chat_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        manifest = FileManifest()
+        collector = KiroCollector(tmp_path / "kiro", manifest=manifest)
+
+        assert collector.collect(date(2024, 12, 10)) == []
+        stat = chat_file.stat()
+        entry = manifest.lookup(str(chat_file), stat.st_mtime_ns, stat.st_size)
+        assert entry.sessions is None and entry.first_date == date(2024, 12, 11)
+
+        sessions = collector.collect(date(2024, 12, 11))
+        assert len(sessions) == 1
+        assert sessions[0].messages == ["实现导出功能"]
+        assert sessions[0].message_count == 3
+
+
+def _write_cursor_db(db_path: Path, composers: list[dict]) -> None:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)")
+    conn.execute(
+        "INSERT INTO ItemTable VALUES ('composer.composerData', ?)",
+        (json.dumps({"allComposers": composers}),),
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestCursorCollector:
+    """CursorCollector 单元测试"""
+
+    def test_collect_and_reuse_connection(self, tmp_path: Path):
+        """测试只读采集并在数据库未变化时复用连接"""
+        db_path = tmp_path / "ws" / "w1" / "state.vscdb"
+        created = int(datetime(2024, 12, 11, 9, 0).timestamp() * 1000)
+        _write_cursor_db(
+            db_path,
+            [
+                {"composerId": "c1", "name": "重构", "createdAt": created},
+                {"composerId": "c2", "name": "旧会话", "createdAt": created - 86400000},
+                {"composerId": "c3", "name": "无时间"},
+            ],
+        )
+        collector = CursorCollector(tmp_path / "ws")
+
+        sessions = collector.collect(date(2024, 12, 11))
+
+        assert [(s.session_id, s.title) for s in sessions] == [("c1", "重构")]
+        signature = collector._db_signature(db_path)
+        conn, _ = collector._connect(db_path, signature)
+        assert collector._connect(db_path, signature)[0] is conn
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM ItemTable")
+        collector.close()
+
+
+class TestCachedSessionCollector:
+    """CachedSessionCollector 单元测试"""
+
+    def test_today_revalidated_by_fingerprint(self, tmp_path: Path):
+        """测试当天结果在源文件变化后失效"""
+        session_file = tmp_path / "projects" / "demo" / "s.jsonl"
+        session_file.parent.mkdir(parents=True)
+        now = datetime.now().isoformat()
+        session_file.write_text(_claude_line(now, "任务A"), encoding="utf-8")
+        inner = ClaudeCodeCollector(tmp_path / "projects")
+        cached = CachedSessionCollector(inner)
+        calls = []
+        original = inner.collect_range
+        inner.collect_range = lambda start, end: calls.append(start) or original(start, end)
+
+        assert cached.collect(date.today())[0].messages == ["任务A"]
+        assert cached.collect(date.today())[0].messages == ["任务A"]
+        assert len(calls) == 1
+
+        with session_file.open("a", encoding="utf-8") as f:
+            f.write(_claude_line(now, "任务B"))
+        assert cached.collect(date.today())[0].messages == ["任务A", "任务B"]
+        assert len(calls) == 2
+
+    def test_yesterday_revalidated_by_fingerprint(self, tmp_path: Path):
+        """测试昨天的结果不视为不可变：按 UTC 归档的会话在本地零点后仍可能写入昨天"""
+        yesterday = date.today() - timedelta(days=1)
+        session_file = tmp_path / "projects" / "demo" / "s.jsonl"
+        session_file.parent.mkdir(parents=True)
+        stamp = datetime.combine(yesterday, datetime.min.time()).replace(hour=23).isoformat()
+        session_file.write_text(_claude_line(stamp, "任务A"), encoding="utf-8")
+        cache_path = tmp_path / "sessions.json"
+        cached = CachedSessionCollector(ClaudeCodeCollector(tmp_path / "projects"), cache_path)
+
+        assert cached.collect(yesterday)[0].messages == ["任务A"]
+        with session_file.open("a", encoding="utf-8") as f:
+            f.write(_claude_line(stamp, "任务B"))
+
+        assert cached.collect(yesterday)[0].messages == ["任务A", "任务B"]
+        assert not cache_path.exists()
+
+    def test_past_date_persisted_and_evicted(self, tmp_path: Path):
+        """测试过去日期的结果持久化，并按 LRU 淘汰"""
+        session_file = tmp_path / "projects" / "demo" / "s.jsonl"
+        session_file.parent.mkdir(parents=True)
+        session_file.write_text(_claude_line("2024-12-11T09:00:00Z", "任务A"), encoding="utf-8")
+        cache_path = tmp_path / "sessions.json"
+
+        cached = CachedSessionCollector(
+            ClaudeCodeCollector(tmp_path / "projects"), cache_path=cache_path, max_entries=2
+        )
+        cached.collect(date(2024, 12, 11))
+        cached.collect(date(2024, 12, 12))
+        cached.collect(date(2024, 12, 13))
+        assert "2024-12-11" not in json.loads(cache_path.read_text(encoding="utf-8"))
+
+        cached.collect(date(2024, 12, 11))
+        session_file.unlink()
+        reloaded = CachedSessionCollector(
+            ClaudeCodeCollector(tmp_path / "projects"), cache_path=cache_path, max_entries=2
+        )
+        assert reloaded.collect(date(2024, 12, 11))[0].messages == ["任务A"]
+
+
+class _ManualWatcher:
+    """测试用监听器：由测试触发变化"""
+
+    def __init__(self) -> None:
+        self.changes = threading.Semaphore(0)
+
+    def wait(self, timeout: float) -> bool:
+        return self.changes.acquire(timeout=timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class _CountingCollector:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.refreshed = threading.Event()
+
+    def collect_range(self, start_date: date, end_date: date) -> dict:
+        self.calls += 1
+        self.refreshed.set()
+        return {start_date: [f"call-{self.calls}"]}
+
+    def fingerprint(self, target_date: date) -> str:
+        return ""
+
+
+class TestWatchingSessionCollector:
+    """监听模式内存索引测试"""
+
+    def test_today_served_from_memory_until_change(self):
+        """测试当天结果来自内存，源文件变化后刷新"""
+        inner = _CountingCollector()
+        watcher = _ManualWatcher()
+        collector = WatchingSessionCollector(inner, watcher, poll_interval=0.05, debounce=0)
+        collector.start()
+        try:
+            assert inner.refreshed.wait(2)
+            today = date.today()
+            assert collector.collect(today) == ["call-1"]
+            assert collector.collect(today) == ["call-1"]
+            assert inner.calls == 1
+
+            inner.refreshed.clear()
+            watcher.changes.release()
+            assert inner.refreshed.wait(2)
+            deadline = time.monotonic() + 2
+            while collector.collect(today) != ["call-2"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert collector.collect(today) == ["call-2"]
+        finally:
+            collector.close()
+
+    @pytest.mark.parametrize("factory", [create_watcher, PollingWatcher])
+    def test_watcher_detects_new_file(self, tmp_path: Path, factory):
+        """测试监听器能发现子目录中的新文件"""
+        project = tmp_path / "project"
+        project.mkdir()
+        watcher = factory([tmp_path])
+        try:
+            (project / "session.jsonl").write_text("{}\n", encoding="utf-8")
+            assert watcher.wait(2)
+        finally:
+            watcher.close()
@@ -0,0 +1,127 @@
+"""工具调用调度测试"""
+
+import asyncio
+import sys
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp_worklog.adapters.inbound.dispatch import ToolDispatcher
+from mcp_worklog.adapters.outbound.storage import LocalFileStorage
+from mcp_worklog.application import WorklogService
+
+
+class _Probe:
+    """记录同时进行的调用数"""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def work(self, seconds: float = 0.05) -> str:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(seconds)
+        with self._lock:
+            self.active -= 1
+        return threading.current_thread().name
+
+
+class TestToolDispatcher:
+    """线程池调度测试"""
+
+    def test_reads_run_in_parallel_off_the_event_loop(self):
+        """测试读调用在线程池中并行，事件循环保持响应"""
+        dispatcher = ToolDispatcher(max_workers=4)
+        probe = _Probe()
+
+        async def scenario() -> tuple[list[str], int]:
+            ticks = 0
+
+            async def ticker() -> None:
+                nonlocal ticks
+                while probe.peak == 0 or probe.active:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            names, _ = await asyncio.gather(
+                asyncio.gather(*(dispatcher.read("get_daily_digest", probe.work) for _ in range(4))),
+                ticker(),
+            )
+            return names, ticks
+
+        try:
+            names, ticks = asyncio.run(scenario())
+        finally:
+            dispatcher.close()
+
+        assert probe.peak == 4
+        assert all(name.startswith("mcp-worklog-tool") for name in names)
+        assert ticks > 1
+
+    def test_tool_limit_and_same_date_writes_are_serialized(self):
+        """测试工具并发上限，同一天的写入串行、不同日期的写入并行"""
+        dispatcher = ToolDispatcher(max_workers=4, tool_limits={"search_worklog": 1})
+        search, same_day, other_days = _Probe(), _Probe(), _Probe()
+
+        async def scenario() -> None:
+            await asyncio.gather(
+                *(dispatcher.read("search_worklog", search.work) for _ in range(3)),
+                *(
+                    dispatcher.write("append_worklog", date(2024, 12, 11), same_day.work)
+                    for _ in range(3)
+                ),
+            )
+            await asyncio.gather(
+                *(
+                    dispatcher.write("rewrite_digest", date(2024, 12, day), other_days.work)
+                    for day in (10, 11, 12)
+                )
+            )
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            dispatcher.close()
+
+        assert search.peak == 1
+        assert same_day.peak == 1
+        assert other_days.peak == 3
+        assert dispatcher._date_locks == {}
+
+    def test_same_day_appends_reach_group_commit_together(self, tmp_path: Path, monkeypatch):
+        """测试经调度器的同一天并发追加不被日期锁串行化，可以合并提交"""
+        storage = LocalFileStorage(tmp_path, group_commit=True, fsync=False)
+        service = WorklogService(storage)
+        dispatcher = ToolDispatcher(max_workers=8)
+        batches: list[int] = []
+        append_lines = storage._append_lines
+
+        def slow_append_lines(target_date, requests):
+            batches.append(len(requests))
+            time.sleep(0.01)  # 模拟 fsync 耗时，期间到达的请求排队等待下一批
+            append_lines(target_date, requests)
+
+        monkeypatch.setattr(storage, "_append_lines", slow_append_lines)
+
+        async def scenario() -> list:
+            return await asyncio.gather(
+                *(
+                    dispatcher.append("append_worklog", service.append_worklog, f"任务{i}")
+                    for i in range(40)
+                )
+            )
+
+        try:
+            results = asyncio.run(scenario())
+        finally:
+            dispatcher.close()
+
+        assert sorted(r.entry_number for r in results) == list(range(1, 41))
+        assert sum(batches) == 40
+        assert max(batches) > 1
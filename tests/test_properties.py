@@ -6,14 +6,14 @@ from datetime import date, datetime
 from pathlib import Path
 
 import pytest
-from hypothesis import given, settings, strategies as st, HealthCheck
+from hypothesis import HealthCheck, given, settings
+from hypothesis import strategies as st
 
 # 添加 src 到路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from mcp_worklog.domain import DailyDigest, DigestFormatter, WorkLogEntry
 
-
 # 生成有效的工作记录内容（非空、无换行）
 valid_content = st.text(
     alphabet=st.characters(blacklist_categories=["Cc", "Cs"], blacklist_characters="\n\r"),
@@ -57,6 +57,53 @@ class TestProperty5RoundTripConsistency:
         parsed_contents = parsed.get_entry_contents()
         assert parsed_contents == original_contents
 
+    @settings(max_examples=200)
+    @given(
+        lines=st.lists(
+            st.one_of(
+                st.text(max_size=30),
+                st.builds(
+                    lambda pad, n, c: f"{pad}{n}. {c}",
+                    st.sampled_from(["", " ", "\t", "\u3000", "\r"]),
+                    st.integers(min_value=0, max_value=999),
+                    st.text(max_size=30),
+                ),
+                st.just("2024-12-11"),
+            ),
+            max_size=15,
+        )
+    )
+    def test_parse_matches_line_by_line_reference(self, lines: list[str]):
+        """单次扫描解析与逐行解析的结果一致，parse_many 与逐天 parse 一致"""
+        text = "\n".join(lines)
+        target = date(2024, 12, 11)
+
+        parsed = DigestFormatter.parse(text, target).get_entry_contents()
+
+        assert parsed == _reference_parse(text)
+        assert DigestFormatter.count_entries(text) == len(parsed)
+        many = DigestFormatter.parse_many({target: text, date(2024, 12, 12): ""})
+        assert many[target].get_entry_contents() == parsed
+        assert many[date(2024, 12, 12)].entries == []
+
+
+def _reference_parse(text: str) -> list[str]:
+    """逐行解析的参考实现：跳过空行和日期行，匹配编号条目"""
+    contents = []
+    for line in text.split("\n"):
+        line = line.lstrip()
+        if not line.strip():
+            continue
+        try:
+            datetime.strptime(line.strip(), DigestFormatter.DATE_FORMAT)
+            continue
+        except ValueError:
+            pass
+        match = DigestFormatter.ENTRY_PATTERN.match(line)
+        if match and match.group(2).strip():
+            contents.append(match.group(2))
+    return contents
+
 
 
 class TestProperty3FileFormatConsistency:
@@ -0,0 +1,454 @@
+"""应用服务单元测试"""
+
+import asyncio
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mcp_worklog.adapters.outbound.polish_state import FilePolishStateStore
+from mcp_worklog.adapters.outbound.search_index import SqliteSearchIndex
+from mcp_worklog.adapters.outbound.storage import LocalFileStorage, SqliteStorage
+from mcp_worklog.application import SessionPaginator, WorklogService
+from mcp_worklog.application.pagination import estimate_chars
+from mcp_worklog.domain import (
+    AISession,
+    DailyDigest,
+    EntryMerger,
+    NearDuplicateFilter,
+    SessionSource,
+    WorkLogEntry,
+)
+from mcp_worklog.domain.similarity import shingles
+from mcp_worklog.domain.tokenizer import tokenize
+
+
+def _session(source: SessionSource, session_id: str, hour: int) -> AISession:
+    return AISession(
+        source=source,
+        session_id=session_id,
+        start_time=datetime(2024, 12, 11, hour),
+        messages=[f"{session_id} 消息"],
+    )
+
+
+class _SyncCollector:
+    def __init__(self, sessions: list[AISession]) -> None:
+        self.sessions = sessions
+
+    def collect(self, target_date: date) -> list[AISession]:
+        return list(self.sessions)
+
+    def collect_range(self, start_date: date, end_date: date) -> dict[date, list[AISession]]:
+        return {date(2024, 12, 11): list(self.sessions)}
+
+
+class _AsyncCollector(_SyncCollector):
+    async def collect(self, target_date: date) -> list[AISession]:
+        await asyncio.sleep(0)
+        return list(self.sessions)
+
+    async def collect_range(
+        self, start_date: date, end_date: date
+    ) -> dict[date, list[AISession]]:
+        await asyncio.sleep(0)
+        return {date(2024, 12, 11): list(self.sessions)}
+
+
+class TestCollectSessions:
+    """会话采集编排测试"""
+
+    def test_async_gather_mixes_sync_and_async_collectors(self, tmp_path: Path):
+        """测试异步采集同时支持同步和异步采集器，并按时间合并"""
+        collectors = [
+            _SyncCollector([_session(SessionSource.KIRO, "k1", 10)]),
+            _AsyncCollector([_session(SessionSource.CURSOR, "c1", 9)]),
+        ]
+        service = WorklogService(LocalFileStorage(tmp_path), collectors, max_concurrency=1)
+
+        result = asyncio.run(service.acollect_sessions(date(2024, 12, 11)))
+        range_result = asyncio.run(
+            service.acollect_sessions_range(date(2024, 12, 10), date(2024, 12, 12))
+        )
+
+        assert [s.session_id for s in result.sessions] == ["c1", "k1"]
+        assert [d.date for d in range_result.days] == ["2024-12-11"]
+        assert service.collect_sessions(date(2024, 12, 11)).sessions == result.sessions
+
+    def test_sorted_collector_streams_are_merged(self, tmp_path: Path):
+        """测试多个采集器各自有序的结果按时间归并，时间相同时按来源排序"""
+        collectors = [
+            _SyncCollector(
+                [_session(SessionSource.KIRO, "k1", 8), _session(SessionSource.KIRO, "k2", 12)]
+            ),
+            _SyncCollector(
+                [_session(SessionSource.CURSOR, "c1", 9), _session(SessionSource.CURSOR, "c2", 12)]
+            ),
+            _SyncCollector([]),
+        ]
+        service = WorklogService(LocalFileStorage(tmp_path), collectors)
+
+        result = service.collect_sessions(date(2024, 12, 11))
+        range_result = service.collect_sessions_range(date(2024, 12, 11), date(2024, 12, 11))
+
+        assert [s.session_id for s in result.sessions] == ["k1", "c1", "c2", "k2"]
+        assert range_result.days[0].sessions == result.sessions
+
+    def test_stream_sessions_without_building_lists(self, tmp_path: Path):
+        """测试流式采集逐个产出归并后的会话，范围采集带上日期"""
+        collectors = [
+            _SyncCollector(
+                [_session(SessionSource.KIRO, "k1", 8), _session(SessionSource.KIRO, "k2", 12)]
+            ),
+            _AsyncCollector([_session(SessionSource.CURSOR, "c1", 9)]),
+        ]
+        service = WorklogService(LocalFileStorage(tmp_path), collectors)
+
+        stream = asyncio.run(service.astream_sessions(date(2024, 12, 11)))
+        ranged = asyncio.run(
+            service.astream_sessions_range(date(2024, 12, 10), date(2024, 12, 12))
+        )
+
+        assert not isinstance(stream, list)
+        assert [s.session_id for s in stream] == ["k1", "c1", "k2"]
+        assert [(day.day, s.session_id) for day, s in ranged] == [(11, "k1"), (11, "c1"), (11, "k2")]
+
+
+class TestSessionPaginator:
+    """会话消息分页测试"""
+
+    def test_snapshot_dedups_in_first_seen_order(self):
+        """测试快照按首次出现顺序去重，页边界固定"""
+        paginator = SessionPaginator(page_size=2)
+        snapshot = paginator.create("2024-12-11", ["a", "b", "a", "c", "b", "d", "e"])
+
+        first = paginator.page(snapshot, 1)
+        last = paginator.page(snapshot, 3)
+
+        assert snapshot.messages == ["a", "b", "c", "d", "e"]
+        assert first.messages == ["a", "b"] and first.has_next
+        assert last.messages == ["e"] and not last.has_next
+        assert paginator.page(snapshot, 4).messages == []
+
+    def test_cursor_lookup_checks_key_and_ttl(self):
+        """测试游标需与日期匹配，过期后失效"""
+        now = [0.0]
+        paginator = SessionPaginator(ttl_seconds=60, clock=lambda: now[0])
+        snapshot = paginator.create("2024-12-11", ["a"])
+
+        assert paginator.get(snapshot.cursor) is snapshot
+        assert paginator.get(snapshot.cursor, "2024-12-11") is snapshot
+        assert paginator.get(snapshot.cursor, "2024-12-12") is None
+        assert paginator.get("unknown") is None
+
+        now[0] = 61.0
+        assert paginator.get(snapshot.cursor) is None
+
+    def test_fixed_pages_still_truncate_messages(self):
+        """测试不按预算分页时单条消息仍有长度上限"""
+        paginator = SessionPaginator(page_size=2)
+        snapshot = paginator.create("2024-12-11", ["开头" + "x" * 2000 + "结尾", "短消息"])
+
+        assert len(snapshot.messages[0]) <= 200
+        assert snapshot.messages[0].startswith("开头") and snapshot.messages[0].endswith("结尾")
+        assert snapshot.messages[1] == "短消息"
+
+    def test_budget_pages_and_truncation(self):
+        """测试按长度预算切页，超长消息保留首尾"""
+        paginator = SessionPaginator(page_budget=20, message_budget=10, estimator=estimate_chars)
+        long_message = "开头" + "x" * 50 + "结尾"
+        snapshot = paginator.create("2024-12-11", ["a" * 8, "b" * 8, "c" * 8, long_message])
+
+        pages = [paginator.page(snapshot, n).messages for n in range(1, 4)]
+
+        truncated = snapshot.messages[3]
+        assert len(truncated) <= 10
+        assert truncated.startswith("开头") and truncated.endswith("结尾")
+        assert pages == [["a" * 8, "b" * 8], ["c" * 8, truncated], []]
+        assert paginator.page(snapshot, 2).total_pages == 2
+
+
+class TestNearDuplicateFilter:
+    """近似重复过滤测试"""
+
+    def test_collapses_rewordings_and_keeps_distinct(self):
+        """测试轻微改写的消息被折叠，不同消息保留"""
+        near_duplicates = NearDuplicateFilter(threshold=0.7, use_numpy=False)
+        messages = [
+            "请帮我修复登录页面的表单校验问题",
+            "请帮我修复登录页面的表单校验问题。",
+            "Please add unit tests for the parser",
+            "please add unit tests for the  parser!",
+            "ok",
+        ]
+
+        assert near_duplicates.filter(messages) == [messages[0], messages[2], messages[4]]
+
+    def test_numpy_signatures_match_pure_python(self):
+        """测试 NumPy 分批计算的签名与纯 Python 实现一致"""
+        pytest.importorskip("numpy")
+        texts = [f"message number {i} about topic {i % 3}" for i in range(10)] + ["a"]
+        sets = [shingles(text) for text in texts]
+
+        vectorized = NearDuplicateFilter(use_numpy=True, batch_size=4).signatures(sets)
+        pure = NearDuplicateFilter(use_numpy=False).signatures(sets)
+
+        assert vectorized == pure
+
+    def test_paginator_compares_without_date_label(self):
+        """测试分页快照按去掉日期标注后的正文比较"""
+        paginator = SessionPaginator(near_duplicates=NearDuplicateFilter(threshold=0.9))
+        snapshot = paginator.create(
+            "2024-12-10 ~ 2024-12-11",
+            ["[2024-12-10] ok", "[2024-12-10] no", "[2024-12-11] ok"],
+            compare_key=lambda m: m.partition("] ")[2],
+        )
+
+        assert snapshot.messages == ["[2024-12-10] ok", "[2024-12-10] no"]
+
+
+class TestIncrementalPolish:
+    """增量润色测试"""
+
+    def test_polish_only_checks_new_entries(self, tmp_path: Path, monkeypatch):
+        """测试润色水位之后只处理新条目，内容不变时不重写文件"""
+        storage = LocalFileStorage(tmp_path)
+        service = WorklogService(storage, polish_state=FilePolishStateStore(tmp_path))
+        target = date.today()
+        for content in ("任务1", "任务2", "任务1"):
+            service.append_worklog(content)
+        saves: list[date] = []
+        original_write = storage._write
+        monkeypatch.setattr(
+            storage, "_write", lambda digest: saves.append(digest.date) or original_write(digest)
+        )
+
+        assert service.polish_digest(target).polished_count == 2
+        assert service.polish_digest(target).polished_count == 2
+        assert saves == [target]
+
+        service.append_worklog("任务3")
+        service.append_worklog("任务2")
+        state = FilePolishStateStore(tmp_path).load(target)
+        result = service.polish_digest(target)
+
+        assert state.entry_count == 2
+        assert storage.load(target).get_entry_contents() == ["任务1", "任务2", "任务3"]
+        assert result.polished_count == 3 and len(saves) == 2
+
+    def test_merge_mode_only_compares_new_entries(self, tmp_path: Path, monkeypatch):
+        """测试合并模式下水位之后的条目只与已有的组比较"""
+        storage = LocalFileStorage(tmp_path)
+        service = WorklogService(storage, polish_state=FilePolishStateStore(tmp_path))
+        target = date.today()
+        for content in ("修复登录接口超时问题", "编写周报", "修复登录接口的超时问题，补充单元测试"):
+            service.append_worklog(content)
+        rows: list[int] = []
+        similarity = service.entry_merger.similarity
+        monkeypatch.setattr(
+            service.entry_merger,
+            "similarity",
+            lambda contents, start=0: rows.append(len(contents) - start)
+            or similarity(contents, start),
+        )
+
+        assert service.polish_digest(target, merge_similar=True).polished_count == 2
+        service.append_worklog("编写周报，补充图表")
+        service.append_worklog("部署测试环境")
+        result = service.polish_digest(target, merge_similar=True)
+
+        assert rows == [3, 2]
+        assert result.polished_count == 3
+        assert storage.load(target).get_entry_contents() == [
+            "修复登录接口的超时问题，补充单元测试",
+            "编写周报，补充图表",
+            "部署测试环境",
+        ]
+        assert FilePolishStateStore(tmp_path).load(target).merged
+
+    def test_rewrite_invalidates_watermark(self, tmp_path: Path):
+        """测试已润色条目被改写后回退为全量润色"""
+        storage = LocalFileStorage(tmp_path)
+        service = WorklogService(storage, polish_state=FilePolishStateStore(tmp_path))
+        target = date(2024, 12, 11)
+        service.rewrite_digest(target, ["任务1", "任务2"])
+        service.polish_digest(target)
+
+        service.rewrite_digest(target, ["任务2", "任务3", "任务2"])
+        result = service.polish_digest(target)
+
+        assert storage.load(target).get_entry_contents() == ["任务2", "任务3"]
+        assert result.polished_count == 2
+
+
+class TestCreatedAtPreserved:
+    """润色和重写保留条目创建时间"""
+
+    def test_polish_and_rewrite_keep_created_at(self, tmp_path: Path):
+        """测试去重、合并、重写后保留下来的条目沿用原来的创建时间"""
+        storage = SqliteStorage(tmp_path / "worklog.db")
+        target = date(2024, 12, 11)
+        times = [datetime(2024, 12, 11, hour) for hour in (9, 10, 11, 12)]
+        contents = ["任务1", "任务1", "修复登录接口超时问题", "修复登录接口的超时问题，补充单元测试"]
+        storage.save(
+            DailyDigest(
+                date=target,
+                entries=[WorkLogEntry(content=c, created_at=t) for c, t in zip(contents, times)],
+            )
+        )
+        service = WorklogService(storage)
+
+        service.polish_digest(target)
+        assert [e.created_at for e in storage.load(target).entries] == [times[0], *times[2:]]
+
+        service.polish_digest(target, merge_similar=True)
+        assert [e.created_at for e in storage.load(target).entries] == [times[0], times[2]]
+
+        service.rewrite_digest(target, ["新任务", "任务1"])
+        entries = storage.load(target).entries
+        assert entries[1].created_at == times[0]
+        assert entries[0].created_at > times[-1]
+
+
+class TestEntryMerger:
+    """相似条目合并测试"""
+
+    ENTRIES = [
+        "修复登录接口超时问题",
+        "编写周报",
+        "修复登录接口的超时问题，补充单元测试",
+        "Review PR #12 for auth module",
+        "review PR #12 for the auth module",
+    ]
+
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_groups_similar_entries_in_order(self, use_numpy: bool):
+        """测试中英文相似条目按原顺序分组，NumPy 与纯 Python 结果一致"""
+        merger = EntryMerger(use_numpy=use_numpy)
+
+        assert merger.groups(self.ENTRIES) == [[0, 2], [1], [3, 4]]
+        assert merger.merge(self.ENTRIES) == [
+            "修复登录接口的超时问题，补充单元测试",
+            "编写周报",
+            "review PR #12 for the auth module",
+        ]
+
+    def test_merge_group_keeps_uncovered_clauses(self):
+        """测试合并时补上主体没有覆盖的分句"""
+        merger = EntryMerger()
+
+        merged = merger.merge_group(["优化首页加载速度，压缩图片资源", "优化首页加载速度；接入 CDN"])
+
+        assert merged == "优化首页加载速度，压缩图片资源；接入 CDN"
+
+    def test_merge_keeps_entries_with_different_names_or_ids(self):
+        """测试相似但人名、版本号不同的条目合并后信息不丢失"""
+        merger = EntryMerger()
+
+        reviews = merger.merge(["review 张三的 PR", "review 李四的 PR"])
+        upgrades = merger.merge(["升级 fastapi 到 0.110", "升级 fastapi 到 0.111"])
+
+        assert len(reviews) == 1 and "张三" in reviews[0] and "李四" in reviews[0]
+        assert "0.110" in upgrades[0] and "0.111" in upgrades[0]
+
+    def test_polish_digest_merge_mode(self, tmp_path: Path):
+        """测试 polish_digest 本地合并相似条目后保存"""
+        storage = LocalFileStorage(tmp_path)
+        target = date(2024, 12, 11)
+        storage.save(
+            DailyDigest(date=target, entries=[WorkLogEntry(content=c) for c in self.ENTRIES])
+        )
+        service = WorklogService(storage)
+
+        result = service.polish_digest(target, merge_similar=True)
+
+        assert (result.original_count, result.polished_count) == (5, 3)
+        assert storage.load(target).get_entry_contents()[1] == "编写周报"
+
+
+class TestSearchWorklog:
+    """日报检索测试"""
+
+    def test_tokenize_cjk_bigrams_and_words(self):
+        """测试中文切成二元组，英文按词小写"""
+        assert tokenize("修复登录 Bug-12") == ["修复", "复登", "登录", "bug", "12"]
+
+    def test_search_ranks_and_follows_updates(self, tmp_path: Path):
+        """测试检索按相关度排序，重写后索引同步更新"""
+        service = WorklogService(
+            LocalFileStorage(tmp_path), search_index=SqliteSearchIndex(tmp_path / "index.db")
+        )
+        service.append_worklog("修复登录页面的表单校验")
+        service.append_worklog("编写周报")
+        service.append_worklog("登录接口增加限流，修复登录超时")
+
+        result = service.search_worklog("修复登录")
+        today = date.today().isoformat()
+
+        assert [(h.date, h.entry_number) for h in result.hits] == [(today, 3), (today, 1)]
+
+        service.rewrite_digest(None, ["编写周报"])
+        assert service.search_worklog("登录").total_count == 0
+        assert service.search_worklog("周报").hits[0].content == "编写周报"
+
+    def test_append_indexes_only_the_new_entry(self, tmp_path: Path, monkeypatch):
+        """测试追加只写入新条目的索引，结果与整天重建一致"""
+        storage = LocalFileStorage(tmp_path)
+        index = SqliteSearchIndex(tmp_path / "index.db")
+        service = WorklogService(storage, search_index=index)
+        monkeypatch.setattr(index, "update", lambda digest: pytest.fail("追加不应重建整天的索引"))
+        for content in ("修复登录页面的表单校验", "编写周报", "登录接口增加限流，修复登录超时"):
+            service.append_worklog(content)
+        incremental = service.search_worklog("修复登录").hits
+
+        monkeypatch.undo()
+        index.update(storage.load(date.today()))
+
+        assert len(incremental) == 2
+        assert service.search_worklog("修复登录").hits == incremental
+
+    def test_append_to_unindexed_day_rebuilds_it(self, tmp_path: Path):
+        """测试向尚未建立索引的日期追加时整天重建，之前的条目也能检索到"""
+        storage = LocalFileStorage(tmp_path)
+        storage.save(DailyDigest(date=date.today(), entries=[WorkLogEntry(content="数据迁移")]))
+        service = WorklogService(storage, search_index=SqliteSearchIndex(tmp_path / "index.db"))
+
+        service.append_worklog("编写周报")
+
+        assert service.search_worklog("迁移").total_count == 1
+        assert service.search_worklog("周报").hits[0].entry_number == 2
+
+    def test_sync_indexes_missing_dates(self, tmp_path: Path):
+        """测试启动时为缺失日期补建索引"""
+        storage = LocalFileStorage(tmp_path)
+        storage.save(DailyDigest(date=date(2024, 12, 10), entries=[WorkLogEntry(content="数据迁移")]))
+        service = WorklogService(storage, search_index=SqliteSearchIndex(tmp_path / "index.db"))
+
+        assert service.sync_search_index() == 1
+        assert service.sync_search_index() == 0
+        assert service.search_worklog("迁移").hits[0].date == "2024-12-10"
+
+
+class TestRangeDigest:
+    """多日日报测试"""
+
+    def test_get_range_digest_skips_missing_days(self, tmp_path: Path):
+        """测试范围内只返回存在日报的日期"""
+        storage = LocalFileStorage(tmp_path)
+        storage.save(DailyDigest(date=date(2024, 12, 9), entries=[WorkLogEntry(content="任务A")]))
+        storage.save(
+            DailyDigest(
+                date=date(2024, 12, 11),
+                entries=[WorkLogEntry(content="任务B"), WorkLogEntry(content="任务C")],
+            )
+        )
+        service = WorklogService(storage)
+
+        result = service.get_range_digest(date(2024, 12, 9), date(2024, 12, 15))
+
+        assert [d.date for d in result.days] == ["2024-12-09", "2024-12-11"]
+        assert result.entry_count == 3
+        assert result.days[1].content == "2024-12-11\n\n1. 任务B\n2. 任务C"
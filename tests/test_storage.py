@@ -1,16 +1,28 @@
 """存储适配器单元测试"""
 
+import multiprocessing
+import sqlite3
 import sys
 import tempfile
-from datetime import date
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
 
 import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from mcp_worklog.adapters.outbound.storage import LocalFileStorage
-from mcp_worklog.domain import DailyDigest, WorkLogEntry
+from mcp_worklog.adapters.outbound.archive import MonthArchive
+from mcp_worklog.adapters.outbound.storage import (
+    _SELECT_DAYS,
+    LocalFileStorage,
+    SqliteStorage,
+)
+from mcp_worklog.domain import DailyDigest, DigestFormatter, WorkLogEntry
 
 
 class TestLocalFileStorage:
@@ -76,3 +88,307 @@ class TestLocalFileStorage:
         storage = LocalFileStorage(tmp_path)
 
         assert storage.exists(date(2024, 1, 1)) is False
+
+    def test_append_matches_full_rewrite(self, tmp_path: Path):
+        """测试追加写入与整体格式化保存的内容一致"""
+        storage = LocalFileStorage(tmp_path)
+        target = date(2024, 12, 11)
+        contents = ["任务1", "任务2", "任务3"]
+
+        numbers = [storage.append(target, WorkLogEntry(content=c))[1] for c in contents]
+        expected = DigestFormatter.format(
+            DailyDigest(date=target, entries=[WorkLogEntry(content=c) for c in contents])
+        )
+
+        assert numbers == [1, 2, 3]
+        assert storage._get_file_path(target).read_text(encoding="utf-8") == expected
+
+    def test_append_recounts_after_external_edit(self, tmp_path: Path):
+        """测试文件被外部修改后重新统计条目数"""
+        storage = LocalFileStorage(tmp_path)
+        target = date(2024, 12, 11)
+        storage.append(target, WorkLogEntry(content="任务1"))
+        storage._get_file_path(target).write_text(
+            "2024-12-11\n\n1. 任务1\n2. 手动添加\n3. 又一条", encoding="utf-8"
+        )
+
+        _, number = storage.append(target, WorkLogEntry(content="任务4"))
+
+        assert number == 4
+        assert storage.load(target).get_entry_contents()[-1] == "任务4"
+
+    def test_load_range_and_list_dates(self, tmp_path: Path):
+        """测试一次扫描批量读取日期范围内的日报"""
+        storage = LocalFileStorage(tmp_path)
+        for day in (10, 11, 13):
+            storage.save(
+                DailyDigest(date=date(2024, 12, day), entries=[WorkLogEntry(content=f"任务{day}")])
+            )
+        (tmp_path / "notes.txt").write_text("无关文件", encoding="utf-8")
+
+        digests = storage.load_range(date(2024, 12, 11), date(2024, 12, 31))
+
+        assert storage.list_dates() == [date(2024, 12, 10), date(2024, 12, 11), date(2024, 12, 13)]
+        assert {d: g.get_entry_contents() for d, g in digests.items()} == {
+            date(2024, 12, 11): ["任务11"],
+            date(2024, 12, 13): ["任务13"],
+        }
+
+    def test_digest_cache_avoids_rereads(self, tmp_path: Path, monkeypatch):
+        """测试文件未变化时不重复读取，写入时同步更新缓存，外部修改后重新读取"""
+        storage = LocalFileStorage(tmp_path, cache_size=1)
+        target = date(2024, 12, 11)
+        reads: list[str] = []
+        original_read_text = Path.read_text
+
+        def counting_read_text(self, *args, **kwargs):
+            reads.append(self.name)
+            return original_read_text(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "read_text", counting_read_text)
+
+        storage.save(DailyDigest(date=target, entries=[WorkLogEntry(content="任务1")]))
+        storage.append(target, WorkLogEntry(content="任务2"))
+        for _ in range(3):
+            assert storage.load(target).get_entry_contents() == ["任务1", "任务2"]
+        assert reads == []
+
+        storage._get_file_path(target).write_text("2024-12-11\n\n1. 外部修改后的内容", encoding="utf-8")
+        assert storage.load(target).get_entry_contents() == ["外部修改后的内容"]
+        assert reads == ["2024-12-11.txt"]
+
+        # 容量为 1 时加载另一天会淘汰前一天
+        storage.save(DailyDigest(date=date(2024, 12, 12), entries=[WorkLogEntry(content="任务3")]))
+        storage.load(target)
+        assert reads == ["2024-12-11.txt", "2024-12-11.txt"]
+
+    def test_archive_months_keeps_reads_unchanged(self, tmp_path: Path):
+        """测试按月归档后读取结果不变，日报文件被移除"""
+        storage = LocalFileStorage(tmp_path)
+        days = [date(2024, 11, 30), date(2024, 12, 10), date(2024, 12, 11), date(2025, 1, 2)]
+        for day in days:
+            storage.save(
+                DailyDigest(date=day, entries=[WorkLogEntry(content=f"任务{day.day}")])
+            )
+        before = {d: g.get_entry_contents() for d, g in storage.load_range(days[0], days[-1]).items()}
+
+        assert storage.archive_months(before=date(2025, 1, 1)) == 3
+
+        assert sorted(p.name for p in (tmp_path / "archive").iterdir()) == [
+            "2024-11.pack",
+            "2024-12.pack",
+        ]
+        assert not storage._get_file_path(days[1]).exists()
+        fresh = LocalFileStorage(tmp_path)
+        assert fresh.list_dates() == days
+        assert fresh.exists(days[1]) and not fresh.exists(date(2024, 12, 12))
+        assert fresh.load(days[1]).get_entry_contents() == ["任务10"]
+        after = fresh.load_range(days[0], days[-1])
+        assert {d: g.get_entry_contents() for d, g in after.items()} == before
+
+    def test_append_to_archived_day_continues_numbering(self, tmp_path: Path):
+        """测试向已归档日期追加时先还原当天内容，再次归档时合并"""
+        storage = LocalFileStorage(tmp_path)
+        target = date(2024, 12, 11)
+        storage.save(
+            DailyDigest(date=target, entries=[WorkLogEntry(content="任务1"), WorkLogEntry(content="任务2")])
+        )
+        storage.archive_months(before=date(2025, 1, 1))
+
+        _, number = storage.append(target, WorkLogEntry(content="任务3"))
+
+        assert number == 3
+        assert storage.load(target).get_entry_contents() == ["任务1", "任务2", "任务3"]
+        assert storage.archive_months(before=date(2025, 1, 1)) == 1
+        assert LocalFileStorage(tmp_path).load(target).get_entry_contents() == [
+            "任务1",
+            "任务2",
+            "任务3",
+        ]
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="需要 fork")
+    def test_archive_from_multiple_processes_keeps_every_day(self, tmp_path: Path):
+        """测试多个进程同时归档时，旧归档不会覆盖其他进程刚打包的日期"""
+        storage = LocalFileStorage(tmp_path)
+        days = [date(2024, 12, day) for day in range(1, 11)]
+        storage.save(DailyDigest(date=days[0], entries=[WorkLogEntry(content="任务1")]))
+        storage.archive_months(before=date(2025, 1, 1))
+        for day in days[1:]:
+            storage.save(DailyDigest(date=day, entries=[WorkLogEntry(content=f"任务{day.day}")]))
+
+        # 慢的进程读完旧归档后停顿，快的进程在此期间完成打包并删除日报文件
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_archive_slowly, args=(tmp_path, delay)) for delay in (0.3, 0)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+
+        fresh = LocalFileStorage(tmp_path)
+        assert fresh.list_dates() == days
+        assert list(tmp_path.glob("*.txt")) == []
+        assert [fresh.load(day).get_entry_contents() for day in days] == [
+            [f"任务{day.day}"] for day in days
+        ]
+
+    @pytest.mark.parametrize("group_commit", [False, True])
+    def test_concurrent_appends_keep_every_entry(self, tmp_path: Path, group_commit: bool):
+        """测试多线程并发追加不丢条目、编号不重复"""
+        storage = LocalFileStorage(tmp_path, group_commit=group_commit, fsync=False)
+        target = date(2024, 12, 11)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda i: storage.append(target, WorkLogEntry(content=f"任务{i}")),
+                    range(40),
+                )
+            )
+
+        assert sorted(number for _, number in results) == list(range(1, 41))
+        assert len(storage.load(target).entries) == 40
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="需要 fork")
+    def test_appends_from_multiple_processes(self, tmp_path: Path):
+        """测试多个进程共用存储目录时条目不丢失"""
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_append_many, args=(tmp_path, n, 10)) for n in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+
+        digest = LocalFileStorage(tmp_path).load(date(2024, 12, 11))
+        assert len(digest.entries) == 30
+        assert digest.entries[-1].content.startswith("进程")
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="需要 fork")
+    def test_update_blocks_appends_from_other_processes(self, tmp_path: Path):
+        """测试读取-修改-保存期间其他进程的追加等待锁释放，不会被覆盖"""
+        storage = LocalFileStorage(tmp_path, fsync=False)
+        target = date(2024, 12, 11)
+        for content in ("任务1", "任务1"):
+            storage.append(target, WorkLogEntry(content=content))
+        context = multiprocessing.get_context("fork")
+        process = context.Process(target=_append_many, args=(tmp_path, 0, 1))
+
+        def dedupe(digest: DailyDigest | None) -> DailyDigest:
+            process.start()
+            time.sleep(0.2)  # 另一个进程此时尝试追加
+            return DailyDigest(date=target, entries=digest.entries[:1])
+
+        assert storage.update(target, dedupe)
+        process.join(timeout=30)
+
+        assert LocalFileStorage(tmp_path).load(target).get_entry_contents() == ["任务1", "进程0-0"]
+
+    def test_save_replaces_atomically(self, tmp_path: Path):
+        """测试整体保存不留下临时文件"""
+        storage = LocalFileStorage(tmp_path)
+        storage.save(DailyDigest(date=date(2024, 12, 11), entries=[WorkLogEntry(content="任务1")]))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [".locks", "2024-12-11.txt"]
+
+
+def _append_many(base_path: Path, worker: int, count: int) -> None:
+    storage = LocalFileStorage(base_path, fsync=False)
+    for i in range(count):
+        storage.append(date(2024, 12, 11), WorkLogEntry(content=f"进程{worker}-{i}"))
+
+
+def _archive_slowly(base_path: Path, delay: float) -> None:
+    read_many = MonthArchive.read_many
+
+    def slow_read_many(self: MonthArchive, dates: list[date]) -> dict[date, str]:
+        texts = read_many(self, dates)
+        time.sleep(delay)
+        return texts
+
+    MonthArchive.read_many = slow_read_many
+    LocalFileStorage(base_path).archive_months(before=date(2025, 1, 1))
+
+
+class _CommitAfterDays:
+    """查询日期之后、查询条目之前执行 commit（模拟另一个进程在此时写入）"""
+
+    def __init__(self, conn: sqlite3.Connection, commit: Callable[[], object]) -> None:
+        self._conn = conn
+        self._commit = commit
+
+    def execute(self, sql: str, *params: object) -> Any:
+        cursor = self._conn.execute(sql, *params)
+        if sql != _SELECT_DAYS:
+            return cursor
+        rows = cursor.fetchall()
+        self._commit()
+        return SimpleNamespace(fetchall=lambda: rows)
+
+
+class TestSqliteStorage:
+    """SqliteStorage 单元测试"""
+
+    def test_save_and_load_keep_created_at(self, tmp_path: Path):
+        """测试保存后加载保留条目内容和创建时间"""
+        storage = SqliteStorage(tmp_path / "worklog.db")
+        created_at = datetime(2024, 12, 11, 9, 30)
+        storage.save(
+            DailyDigest(
+                date=date(2024, 12, 11),
+                entries=[WorkLogEntry(content="任务1", created_at=created_at)],
+            )
+        )
+
+        loaded = storage.load(date(2024, 12, 11))
+
+        assert loaded.get_entry_contents() == ["任务1"]
+        assert loaded.entries[0].created_at == created_at
+        assert storage.load(date(2024, 12, 12)) is None
+
+    def test_append_numbers_and_range(self, tmp_path: Path):
+        """测试追加编号连续，范围查询按日期分组"""
+        storage = SqliteStorage(tmp_path / "worklog.db")
+        numbers = [
+            storage.append(date(2024, 12, 11), WorkLogEntry(content="任务1"))[1],
+            storage.append(date(2024, 12, 11), WorkLogEntry(content="任务2"))[1],
+            storage.append(date(2024, 12, 12), WorkLogEntry(content="任务3"))[1],
+        ]
+        storage.save(DailyDigest(date=date(2024, 12, 13), entries=[]))
+
+        digests = storage.load_range(date(2024, 12, 11), date(2024, 12, 13))
+
+        assert numbers == [1, 2, 1]
+        assert [d.get_entry_contents() for d in digests.values()] == [["任务1", "任务2"], ["任务3"], []]
+        assert storage.exists(date(2024, 12, 13)) is True
+        assert storage.list_dates() == [date(2024, 12, 11), date(2024, 12, 12), date(2024, 12, 13)]
+
+    def test_load_range_reads_one_snapshot(self, tmp_path: Path):
+        """测试两次查询之间其他连接新增的日期不会破坏范围加载"""
+        storage = SqliteStorage(tmp_path / "worklog.db")
+        other = SqliteStorage(tmp_path / "worklog.db")
+        storage.append(date(2024, 12, 11), WorkLogEntry(content="任务1"))
+        storage._conn = _CommitAfterDays(
+            storage._conn,
+            lambda: other.append(date(2024, 12, 12), WorkLogEntry(content="任务2")),
+        )
+
+        digests = storage.load_range(date(2024, 12, 11), date(2024, 12, 12))
+
+        assert list(digests) == [date(2024, 12, 11)]
+        assert len(other.load_range(date(2024, 12, 11), date(2024, 12, 12))) == 2
+
+    def test_import_files_once(self, tmp_path: Path):
+        """测试导入文本日报，已存在的日期不覆盖"""
+        files = LocalFileStorage(tmp_path)
+        files.save(DailyDigest(date=date(2024, 12, 10), entries=[WorkLogEntry(content="旧任务")]))
+        files.save(DailyDigest(date=date(2024, 12, 11), entries=[WorkLogEntry(content="文件")]))
+        storage = SqliteStorage(tmp_path / "worklog.db")
+        storage.append(date(2024, 12, 11), WorkLogEntry(content="数据库"))
+
+        assert storage.import_files(files) == 1
+        assert storage.import_files(files) == 0
+        assert storage.load(date(2024, 12, 10)).get_entry_contents() == ["旧任务"]
+        assert storage.load(date(2024, 12, 11)).get_entry_contents() == ["数据库"]